@@ -2,7 +2,8 @@
 # This module handles fetching data from the ACCOUNT-V1 API endpoints.
 # Base URL: https://{routing}.api.riotgames.com (routing: americas, europe, asia, sea)
 
-import requests
+from riot_http import riot_get
+import riot_id_cache
 
 #: str, -> dict are type hints, just hint what type to put and return
 
@@ -23,12 +24,12 @@ def get_account_by_riot_id(api_key: str, region: str, game_name: str, tag_line:
 
     # Creates HTTP headers (metadata), need api key,( requests module library), header method is more recommended for security reason instead of appending api_key at the back  
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers) # will return a response object not json. 
-
-    if response.status_code == 200:   # if the status code is 200, then. 
-        return response.json()
-    else:
-        response.raise_for_status()
+    # will return a response object not json. Resolved IDs (and recent 404s) are cached, so the call only happens on a miss;
+    # raises riot_id_cache.RiotIdNotFound (an HTTPError) when the Riot ID does not exist
+    return riot_id_cache.resolve(
+        game_name, tag_line, region,
+        lambda: riot_get(url, "account-v1.getByRiotId", headers=headers)
+    )
 
 def get_account_by_puuid(api_key: str, region: str, puuid: str) -> dict:
     """
@@ -41,7 +42,7 @@ def get_account_by_puuid(api_key: str, region: str, puuid: str) -> dict:
     """
     url = f"https://{region}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "account-v1.getByPuuid", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -59,7 +60,7 @@ def get_active_shard_for_player(api_key: str, region: str, puuid: str, game: str
     """
     url = f"https://{region}.api.riotgames.com/riot/account/v1/active-shards/by-game/{game}/by-puuid/{puuid}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "account-v1.getActiveShard", headers=headers)
     if response.status_code == 200:
         return response.json()  # automatically converts into python dict 
     else:
@@ -0,0 +1,67 @@
+# cache_policy.py
+# Freshness rules for the playerUserData result cache.
+#
+# Each feature has a fresh window, during which a cached result is served as-is, and a longer
+# max age. Between the two the entry is stale: it is still served straight away, but the
+# handler starts a background refresh. Past the max age the entry counts as a miss. Entries
+# also carry an expiresAt attribute so DynamoDB TTL deletes them once they are past the max age.
+#
+# Windows can be overridden per feature with CACHE_FRESH_SECONDS_<FEATURE> and
+# CACHE_MAX_AGE_SECONDS_<FEATURE> (e.g. CACHE_FRESH_SECONDS_SAW=3600).
+
+import os
+import time
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+# feature -> (fresh seconds, max age seconds)
+DEFAULT_POLICIES = {
+    "YES": (24 * 60 * 60, 30 * 24 * 60 * 60),
+    "SAW": (6 * 60 * 60, 14 * 24 * 60 * 60),
+    "COMP": (6 * 60 * 60, 14 * 24 * 60 * 60),
+}
+
+
+def feature_of(sort_key):
+    """"2025#SAW" -> "SAW"."""
+    return sort_key.split("#", 1)[-1]
+
+
+def policy(sort_key):
+    feature = feature_of(sort_key)
+    fresh, max_age = DEFAULT_POLICIES.get(feature, DEFAULT_POLICIES["YES"])
+    return (
+        int(os.getenv(f"CACHE_FRESH_SECONDS_{feature}", fresh)),
+        int(os.getenv(f"CACHE_MAX_AGE_SECONDS_{feature}", max_age)),
+    )
+
+
+def expires_at(sort_key, timestamp=None):
+    """Value for the DynamoDB TTL attribute of an entry written at `timestamp`."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return timestamp + policy(sort_key)[1]
+
+
+def classify(item, sort_key, now=None):
+    """
+    Returns (status, age_seconds) for a cached item: HIT, STALE or MISS.
+
+    DynamoDB TTL deletes expired items lazily (up to a couple of days late), so the max age is
+    checked here as well.
+    """
+    if not item or "result" not in item:
+        return MISS, 0
+    now = int(time.time()) if now is None else now
+    age = max(0, now - int(item.get("timestamp", 0)))
+    fresh, max_age = policy(sort_key)
+    if age <= fresh:
+        return HIT, age
+    if age <= max_age:
+        return STALE, age
+    return MISS, age
+
+
+def cache_headers(status, age):
+    return {"X-Cache": status, "Age": str(age)}
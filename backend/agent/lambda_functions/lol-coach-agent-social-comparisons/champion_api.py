@@ -2,7 +2,7 @@
 # This module handles fetching data from the CHAMPION-V3 API endpoints.
 # Base URL: https://{platform}.api.riotgames.com (platform: na1, euw1, etc.)
 
-import requests
+from riot_http import riot_get
 
 def get_champion_rotations(api_key: str, platform: str) -> dict:
     """
@@ -14,7 +14,7 @@ def get_champion_rotations(api_key: str, platform: str) -> dict:
     """
     url = f"https://{platform}.api.riotgames.com/lol/platform/v3/champion-rotations"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "champion-v3.getChampionInfo", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
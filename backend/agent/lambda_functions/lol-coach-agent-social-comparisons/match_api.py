@@ -2,7 +2,11 @@
 # This module handles fetching data from the MATCH-V5 API endpoints.
 # Base URL: https://{routing}.api.riotgames.com (routing: americas, europe, asia, sea)
 
-import requests
+from riot_http import riot_get
+import json
+import match_cache
+import match_decoder
+from routing import region_for_match_id
 
 def get_match_ids_by_puuid(api_key: str, region: str, puuid: str, start: int = 0, count: int = 1, **kwargs) -> list:
     """
@@ -19,20 +23,21 @@ def get_match_ids_by_puuid(api_key: str, region: str, puuid: str, start: int = 0
     url = f"https://{region}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
     params = {"start": start, "count": count, **kwargs}
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers, params=params)
+    response = riot_get(url, "match-v5.getMatchIdsByPUUID", headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
         response.raise_for_status()
 
-def get_match_details(api_key: str, region: str, match_id: str) -> dict:
+def get_match_details(api_key: str, region: str, match_id: str, puuids: set = None) -> dict:
     """
     Fetches detailed info for a specific match.
     
     :param api_key: Riot API key
     :param routing: Regional routing value (e.g., 'americas', 'europe', 'asia', 'sea')
     :param match_id: The match ID (e.g., 'NA1_1234567890')
-    :return: JSON response with full match details
+    :param puuids: If given, only the fields read by match_table are kept for these players and their teammates (see match_decoder)
+    :return: JSON response with full match details (slim with puuids)
     """
 
      # this returns JSON object with two top-level keys
@@ -40,10 +45,19 @@ def get_match_details(api_key: str, region: str, match_id: str) -> dict:
       # info: Detailed match data, including gameCreation (timestamp when match was created), gameDuration (length in seconds), gameEndTimestamp, gameId (numeric ID), gameMode (e.g., "CLASSIC"), 
       # gameName, gameStartTimestamp, gameType (e.g., "MATCHED_GAME"), gameVersion (patch version), mapId, platformId (server region), queueId (queue type), tournamentCode (if applicable), 
       # teams (array of 2 team objects with bans, objectives like kills on baron/dragon/towers, teamId, and win status), and participants (array of 10 detailed player objects).
+    # finished matches never change, so check the match cache before calling Riot
+    cached = match_cache.get_raw(match_id)
+    if cached is not None:
+        return match_decoder.decode(cached, puuids) if puuids else json.loads(cached)
+    # route by the match ID's platform prefix (e.g. NA1_ -> americas), region is only a fallback
+    region = region_for_match_id(match_id, region)
     url = f"https://{region}.api.riotgames.com/lol/match/v5/matches/{match_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "match-v5.getMatch", headers=headers)
     if response.status_code == 200:
+        match_cache.put_raw(match_id, response.content)
+        if puuids:
+            return match_decoder.decode(response.content, puuids)
         return response.json()
     else:
         response.raise_for_status()
@@ -57,10 +71,16 @@ def get_match_timeline(api_key: str, region: str, match_id: str) -> dict:
     :param match_id: The match ID (e.g., 'NA1_1234567890')
     :return: JSON response with match timeline data
     """
+    cached = match_cache.get_json(f"{match_id}/timeline")
+    if cached is not None:
+        return cached
+    # route by the match ID's platform prefix (e.g. NA1_ -> americas), region is only a fallback
+    region = region_for_match_id(match_id, region)
     url = f"https://{region}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "match-v5.getTimeline", headers=headers)
     if response.status_code == 200:
+        match_cache.put_raw(f"{match_id}/timeline", response.content)
         return response.json()
     else:
         response.raise_for_status()
@@ -0,0 +1,188 @@
+# match_cache.py
+# Content cache for MATCH-V5 documents.
+#
+# A finished match never changes, so /lol/match/v5/matches/{id} (and its timeline) only ever
+# needs to be downloaded once. Documents are stored as gzip-compressed raw response bytes
+# keyed by match ID in one of the pluggable stores below, selected with MATCH_CACHE_URL:
+#   dir:///tmp/match-cache        one file per match (default, survives warm invocations)
+#   sqlite:///tmp/match-cache.db  one row per match
+#   s3://bucket/prefix            one object per match, shared by every Lambda
+#   none                          disable caching
+# A lookup is a single key read. Local stores evict the oldest writes once MATCH_CACHE_MAX_BYTES
+# is exceeded (FIFO keeps reads free of bookkeeping writes); S3 relies on a bucket lifecycle rule.
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+MATCH_CACHE_URL = os.getenv("MATCH_CACHE_URL", "dir:///tmp/match-cache")
+MATCH_CACHE_MAX_BYTES = int(os.getenv("MATCH_CACHE_MAX_BYTES", str(300 * 1024 * 1024)))
+
+
+class DirectoryStore:
+    def __init__(self, path, max_bytes=MATCH_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = None  # key -> (size, written_at), built lazily on first write
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key.replace("/", "__") + ".gz")
+
+    def get(self, key):
+        try:
+            with open(self._file(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, value):
+        target = self._file(key)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(value)
+        os.replace(tmp, target)
+        with self._lock:
+            if self._sizes is None:
+                self._sizes = {}
+                for entry in os.scandir(self.path):
+                    if entry.name.endswith(".gz"):
+                        stat = entry.stat()
+                        self._sizes[entry.path] = (stat.st_size, stat.st_mtime)
+            self._sizes[target] = (len(value), time.time())
+            self._evict()
+
+    def _evict(self):
+        total = sum(size for size, _ in self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(self._sizes.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            del self._sizes[path]
+            total -= size
+
+
+class SQLiteStore:
+    def __init__(self, path, max_bytes=MATCH_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, written_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_written_at ON documents (written_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM documents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (key, value, size, written_at) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT key, size FROM documents ORDER BY written_at LIMIT 1"
+                ).fetchone()
+                if oldest is None or oldest[0] == key:
+                    break
+                self._conn.execute("DELETE FROM documents WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+            self._conn.commit()
+
+
+class S3Store:
+    def __init__(self, bucket, prefix=""):
+        import boto3
+        self.s3 = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}.gz" if self.prefix else f"{key}.gz"
+
+    def get(self, key):
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key, value):
+        self.s3.put_object(Bucket=self.bucket, Key=self._key(key), Body=value)
+
+
+def open_store(url=MATCH_CACHE_URL):
+    """Builds a store from a cache URL (see the module header), or None when caching is disabled."""
+    if not url or url == "none":
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "dir":
+        return DirectoryStore(parsed.path)
+    if parsed.scheme == "sqlite":
+        return SQLiteStore(parsed.path)
+    if parsed.scheme == "s3":
+        return S3Store(parsed.netloc, parsed.path)
+    raise ValueError(f"Unsupported match cache URL: {url}")
+
+
+_store = None
+_store_ready = False
+
+
+def get_store():
+    global _store, _store_ready
+    if not _store_ready:
+        _store = open_store()
+        _store_ready = True
+    return _store
+
+
+def set_store(store):
+    """Overrides the configured store (e.g. a shared SQLite file for batch runs)."""
+    global _store, _store_ready
+    _store = store
+    _store_ready = True
+
+
+def get_raw(key):
+    """Returns the cached response bytes for a match document key, or None."""
+    store = get_store()
+    if store is None:
+        return None
+    try:
+        value = store.get(key)
+    except Exception as e:
+        print(f"Match cache read failed for {key}: {e}")
+        return None
+    return gzip.decompress(value) if value is not None else None
+
+
+def put_raw(key, raw):
+    store = get_store()
+    if store is None:
+        return
+    try:
+        store.put(key, gzip.compress(raw, compresslevel=6))
+    except Exception as e:
+        print(f"Match cache write failed for {key}: {e}")
+
+
+def get_json(key):
+    raw = get_raw(key)
+    return json.loads(raw) if raw is not None else None
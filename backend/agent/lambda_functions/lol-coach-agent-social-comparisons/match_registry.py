@@ -0,0 +1,89 @@
+# match_registry.py
+# Fetch-once participant rows for runs that analyze several players together (a comparison's
+# two players, a ladder batch).
+#
+# Every MATCH-V5 payload carries all 10 participants, yet analyzing each player on their own
+# downloads a match once per player in it (duos, players of one ladder meeting each other).
+# A registry knows the PUUIDs of the run: the first request for a match ID downloads it once
+# and projects it (match_table.project_participant) for every tracked PUUID in it, keeping
+# only those rows, so the other tracked players' requests for that match cost no download.
+# Concurrent requests for the same match wait for the one download in flight.
+#
+# get_raw_metrics goes through the registry set with set_registry(), and downloads directly
+# when none is set (single-player requests).
+
+import threading
+from match_table import project_participant
+
+
+class MatchRegistry:
+    def __init__(self, puuids=()):
+        self._lock = threading.Lock()
+        self._tracked = set(puuids)
+        self._projected = {}  # match ID -> PUUIDs it was projected for
+        self._rows = {}  # (match ID, PUUID) -> row
+        self._inflight = {}  # match ID -> Event set when its download finishes
+        self.requests = 0
+        self.downloads = 0
+
+    def track(self, puuid):
+        with self._lock:
+            self._tracked.add(puuid)
+
+    def participant_row(self, match_id, puuid, fetch):
+        """
+        The player's row of a match (None if they are not in it). fetch(match_id, puuids) returns
+        the payload, which needs full stats for at least those PUUIDs (see match_decoder), and is
+        only called when no earlier request projected the match for this player.
+        """
+        with self._lock:
+            self._tracked.add(puuid)
+            self.requests += 1
+        while True:
+            with self._lock:
+                if puuid in self._projected.get(match_id, ()):
+                    return self._rows.get((match_id, puuid))
+                done = self._inflight.get(match_id)
+                if done is None:
+                    done = self._inflight[match_id] = threading.Event()
+                    break
+            # Another thread is downloading it; if that fails (or predates this PUUID) try again
+            done.wait()
+
+        try:
+            with self._lock:
+                tracked = frozenset(self._tracked)
+            payload = fetch(match_id, tracked)
+            with self._lock:
+                self.downloads += 1
+            rows = {p: project_participant(payload, p) for p in tracked.intersection(payload['metadata']['participants'])}
+            with self._lock:
+                self._projected[match_id] = self._projected.get(match_id, frozenset()) | tracked
+                self._rows.update(((match_id, p), row) for p, row in rows.items() if row is not None)
+            return rows.get(puuid)
+        finally:
+            with self._lock:
+                del self._inflight[match_id]
+            done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "downloads": self.downloads,
+                "saved": self.requests - self.downloads,
+                "players": len(self._tracked),
+            }
+
+
+_registry = None
+
+
+def get_registry():
+    return _registry
+
+
+def set_registry(registry):
+    """Routes match downloads of this process through `registry` (None: download directly)."""
+    global _registry
+    _registry = registry
@@ -0,0 +1,160 @@
+# rate_limiter.py
+# Client-side throttling for the Riot API, driven by the rate-limit headers Riot sends back.
+#
+# Riot enforces an application limit per routing host (americas, sea, sg2, na1, ...) and a
+# separate limit per method on that host. Both are advertised on every response:
+#   X-App-Rate-Limit: 20:1,100:120          (20 requests per 1s, 100 per 120s)
+#   X-App-Rate-Limit-Count: 3:1,41:120      (requests already counted in each window)
+#   X-Method-Rate-Limit / X-Method-Rate-Limit-Count (same format, per method)
+# Callers acquire() before sending and update() with the response, so threads wait for a
+# free slot locally instead of paying for a 429 round trip and a Retry-After sleep.
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+# Personal/development key limits, used until the first response tells us the real ones
+DEFAULT_APP_LIMITS = "20:1,100:120"
+
+# Fraction of every limit this process may use (e.g. 0.25 when four worker processes share a key)
+RATE_LIMIT_SHARE = float(os.getenv("RIOT_RATE_LIMIT_SHARE", "1"))
+
+
+def parse_limits(header):
+    """Parses '20:1,100:120' into [(20, 1), (100, 120)] (count, seconds)."""
+    limits = []
+    for part in (header or "").split(","):
+        if ":" not in part:
+            continue
+        count, seconds = part.strip().split(":", 1)
+        limits.append((int(count), int(seconds)))
+    return limits
+
+
+def routing_host(url):
+    """'https://sea.api.riotgames.com/lol/...' -> 'sea'"""
+    return urlparse(url).hostname.split(".")[0].lower()
+
+
+class _Window:
+    # Fixed window, started by the first request after the previous one expired (Riot's model)
+    __slots__ = ("limit", "seconds", "count", "reset_at")
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.count = 0
+        self.reset_at = 0.0
+
+    def wait_time(self, now):
+        if now >= self.reset_at or self.count < self.limit:
+            return 0.0
+        return self.reset_at - now
+
+    def take(self, now):
+        if now >= self.reset_at:
+            self.count = 0
+            self.reset_at = now + self.seconds
+        self.count += 1
+
+    def sync(self, server_count, now):
+        # The server count can lag our own (in-flight requests), never trust it downwards
+        if now >= self.reset_at:
+            self.count = 0
+            self.reset_at = now + self.seconds
+        self.count = max(self.count, server_count)
+
+
+class _Bucket:
+    """All rate-limit windows for one (host) or (host, method) pair."""
+
+    def __init__(self, limits, share):
+        self.share = share
+        self.windows = {}
+        self.blocked_until = 0.0
+        self.limits = []
+        self.set_limits(limits)
+
+    def set_limits(self, limits):
+        self.limits = limits
+        windows = {}
+        for count, seconds in limits:
+            allowed = max(1, int(count * self.share))
+            window = self.windows.get(seconds) or _Window(allowed, seconds)
+            window.limit = allowed
+            windows[seconds] = window
+        self.windows = windows
+
+    def wait_time(self, now):
+        wait = max(0.0, self.blocked_until - now)
+        for window in self.windows.values():
+            wait = max(wait, window.wait_time(now))
+        return wait
+
+    def take(self, now):
+        for window in self.windows.values():
+            window.take(now)
+
+    def sync(self, limits_header, counts_header, now):
+        limits = parse_limits(limits_header)
+        if limits and limits != self.limits:
+            self.set_limits(limits)
+        for count, seconds in parse_limits(counts_header):
+            window = self.windows.get(seconds)
+            if window is not None:
+                window.sync(count, now)
+
+
+class RateLimiter:
+    """Token-bucket style limiter with one bucket per routing host and per (host, method)."""
+
+    def __init__(self, default_app_limits=DEFAULT_APP_LIMITS, share=RATE_LIMIT_SHARE):
+        self.default_app_limits = parse_limits(default_app_limits)
+        self.share = share
+        self._lock = threading.Lock()
+        self._app_buckets = {}
+        self._method_buckets = {}
+
+    def _buckets(self, host, method):
+        app = self._app_buckets.get(host)
+        if app is None:
+            app = self._app_buckets[host] = _Bucket(self.default_app_limits, self.share)
+        key = (host, method)
+        method_bucket = self._method_buckets.get(key)
+        if method_bucket is None:
+            # Method limits are unknown until the first response for that method
+            method_bucket = self._method_buckets[key] = _Bucket([], self.share)
+        return app, method_bucket
+
+    def acquire(self, url, method):
+        """Blocks until both the app and method buckets for this request have room."""
+        host = routing_host(url)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                app, method_bucket = self._buckets(host, method)
+                wait = max(app.wait_time(now), method_bucket.wait_time(now))
+                if wait <= 0:
+                    app.take(now)
+                    method_bucket.take(now)
+                    return
+            time.sleep(wait)
+
+    def update(self, url, method, response):
+        """Syncs the buckets with the limits and counts reported on a response."""
+        host = routing_host(url)
+        headers = response.headers
+        with self._lock:
+            now = time.monotonic()
+            app, method_bucket = self._buckets(host, method)
+            app.sync(headers.get("X-App-Rate-Limit"), headers.get("X-App-Rate-Limit-Count"), now)
+            method_bucket.sync(headers.get("X-Method-Rate-Limit"), headers.get("X-Method-Rate-Limit-Count"), now)
+            if response.status_code == 429:
+                retry_after = int(headers.get("Retry-After", 1))
+                blocked = app if headers.get("X-Rate-Limit-Type") == "application" else method_bucket
+                blocked.blocked_until = max(blocked.blocked_until, now + retry_after)
+
+
+# Process-wide instance shared by every API helper
+limiter = RateLimiter()
@@ -1,12 +1,18 @@
 import json
 import os
 # Import the new function from your social_comparison.py script
-from strengths_weaknesses import analyze_strengths_weaknesses
+from strengths_weaknesses import analyze_strengths_weaknesses, resolve_puuid
 from social_comparisons import generate_social_comparison
+from riot_client import client
+import lease
+import cache_policy
+import result_codec
+import match_registry
+from riot_id_cache import RiotIdNotFound
 
 import boto3
 import time
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
 
 # The "structured" event for this handler should look like this:
@@ -33,32 +39,117 @@ from decimal import Decimal
 dynamodb = boto3.resource('dynamodb')
 table_name = os.getenv("DYNAMODB_TABLE", "playerUserData")
 table = dynamodb.Table(table_name)
+lambda_client = boto3.client('lambda')
 
 # --- DynamoDB Helper Functions ---
 # (Copied from your template)
 
-#dynamoDB doenst support storing float, so this helps to convert every  float to decimal
-def convert_floats_to_decimal(obj):
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: convert_floats_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_floats_to_decimal(v) for v in obj]
-    else:
-        return obj
-    
-# convert the decimal back to float
-def convert_decimal_to_float(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: convert_decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_decimal_to_float(v) for v in obj]
-    else:
-        return obj
-    
+# Results are stored as compressed binary blobs (see result_codec), which also keeps floats
+# out of DynamoDB's Decimal numbers; result_codec.decode still reads the old nested-map items
+
+# How long a request without the compute lease waits for the leader's result before answering 202
+LEASE_WAIT_SECONDS = 20
+
+def wait_for_leader(pk, sk, context, newer_than=None):
+    """Waits (with backoff) for the invocation holding the lease to store its result; returns it or None."""
+    wait = LEASE_WAIT_SECONDS
+    if context is not None:
+        wait = min(wait, context.get_remaining_time_in_millis() / 1000 - 5)
+    item = lease.wait_for_result(table, {'player': pk, 'year#feature': sk}, wait, newer_than=newer_than)
+    return result_codec.decode(item['result']) if item else None
+
+# Re-invokes this Lambda asynchronously to recompute a stale entry; the new invocation inherits the lease
+def start_background_refresh(event, context, pk, sk):
+    if context is None or not hasattr(context, 'invoked_function_arn'):
+        return
+    token = lease.acquire_lease(table, pk, sk)
+    if token is None:
+        return  # another invocation is already recomputing it
+    try:
+        lambda_client.invoke(
+            FunctionName=context.invoked_function_arn,
+            InvocationType='Event',
+            Payload=json.dumps({**event, 'cacheRefreshLease': token})
+        )
+    except Exception as e:
+        print(f"Background refresh could not be started: {str(e)}")
+        lease.release_lease(table, pk, sk, token)
+
+# Reads several items in one BatchGetItem round trip; returns {(player, year#feature): item}
+def batch_get(keys):
+    unique = list({(k['player'], k['year#feature']): k for k in keys}.values())  # BatchGetItem rejects duplicate keys
+    items = {}
+    request = {table_name: {'Keys': unique}}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response.get('Responses', {}).get(table_name, []):
+            items[(item['player'], item['year#feature'])] = item
+        request = response.get('UnprocessedKeys') or None
+    return items
+
+# Analysis for a player whose SAW cache entry is not usable, None when the cached one is
+def needs_analysis(saw_item, refreshing):
+    cache_status, _ = cache_policy.classify(saw_item, '2025#SAW')
+    # a background refresh should not rebuild the comparison from stale analyses
+    return not (cache_status == cache_policy.HIT or (cache_status == cache_policy.STALE and not refreshing))
+
+# runs the comparison and stores it, returns (status code, body)
+def run_comparison(players, saw_items, pk, sk, refreshing=False):
+    # players: [(game_name, tagline, region), ...]; saw_items: their cached 2025#SAW items (or None)
+    analyses = [
+        None if needs_analysis(item, refreshing) else result_codec.decode(item['result'])
+        for item in saw_items
+    ]
+    missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+    if len(missing) == 2:
+        # Duos share matches: with both players tracked up front, each shared match is downloaded
+        # once and its rows fanned out to both analyses
+        registry = match_registry.MatchRegistry(resolve_puuid(*player) for player in players)
+        match_registry.set_registry(registry)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                analyses = list(executor.map(lambda player: analyze_strengths_weaknesses(*player), players))
+        finally:
+            match_registry.set_registry(None)
+        print("Match registry: " + json.dumps(registry.stats()))
+    elif missing:
+        analyses[missing[0]] = analyze_strengths_weaknesses(*players[missing[0]])
+
+    result = generate_social_comparison(analyses[0], analyses[1])
+    print("Riot connection pool: " + json.dumps(client.pool_stats()))
+
+    # if no data or error from the function
+    if result is None or 'error' in result:
+        print("Comparison failed or returned no data")
+        return 404, result or {'error': 'No data returned'}
+
+    # Else if got data, save the comparison and any new analyses to DynamoDB in one BatchWriteItem
+    now = int(time.time())
+    new_items = {}
+    for i in missing:
+        if analyses[i] and 'error' not in analyses[i]:
+            saw_pk = "#".join(players[i])
+            new_items[saw_pk] = {
+                'player': saw_pk,
+                'year#feature': '2025#SAW',
+                'result': result_codec.encode(analyses[i]),
+                'timestamp': now,
+                'expiresAt': cache_policy.expires_at('2025#SAW', now)
+            }
+    new_items[pk] = {
+        'player': pk,          # Combined partition key
+        'year#feature': sk,    # "Comparison" sort key
+        'result': result_codec.encode(result),
+        'timestamp': now,
+        'expiresAt': cache_policy.expires_at(sk, now)  # DynamoDB TTL attribute (hard expiry)
+    }
+    with table.batch_writer() as batch:
+        for item in new_items.values():
+            batch.put_item(Item=item)
+
+    print ("Stored new comparison results in DynamoDB")
+    print("Comparison result: " + json.dumps(result))
+    return 200, result
 
 def lambda_handler(event, context):
     print("Event received: " + json.dumps(event))  # Debug log
@@ -107,46 +198,57 @@ def lambda_handler(event, context):
     sk = "2025#COMP" # Sort key for "Comparison"
 
     try:
-        # Check DynamoDB cache
-        cached = table.get_item(Key={'player': pk, 'year#feature': sk})
-        if 'Item' in cached and 'result' in cached['Item']:
-            print("Returning cached result from database")
-            clean_result = convert_decimal_to_float(cached['Item']['result'])
-            return format_response(200, clean_result, action_group, api_path, http_method, event)
-
-
-        # If not cached, call the core comparison function
-        print("Cache miss, running new comparison")
-        player1_cached_data = table.get_item(Key={'player': pk1, 'year#feature': '2025#SAW'})
-        if 'Item' in player1_cached_data and 'result' in player1_cached_data['Item']:
-            player1_data = convert_decimal_to_float(player1_cached_data['Item']['result'])
-        else:
-            player1_data = analyze_strengths_weaknesses(game_name_1, tagline_1, region_1)
-        
-        player2_cached_data = table.get_item(Key={'player': pk2, 'year#feature': '2025#SAW'})
-        if 'Item' in player2_cached_data and 'result' in player2_cached_data['Item']:
-            player2_data = convert_decimal_to_float(player2_cached_data['Item']['result'])
-        else:
-            player2_data = analyze_strengths_weaknesses(game_name_2, tagline_2, region_2)
-        
-        result = generate_social_comparison(player1_data, player2_data)
-
-        # if no data or error from the function
-        if result is None or 'error' in result:
-            print("Comparison failed or returned no data")
-            return format_response(404, result or {'error': 'No data returned'}, action_group, api_path, http_method, event)
-
-        # Else if got data, save to DynamoDB
-        table.put_item(Item={
-            'player': pk,          # Combined partition key
-            'year#feature': sk,    # "Comparison" sort key
-            'result': convert_floats_to_decimal(result),
-            'timestamp': int(time.time())
-        })
-
-        print ("Stored new comparison results in DynamoDB")
-        print("Comparison result: " + json.dumps(result))
-        return format_response(200, result, action_group, api_path, http_method, event)
+        players = [(game_name_1, tagline_1, region_1), (game_name_2, tagline_2, region_2)]
+
+        # One round trip for the comparison and both players' analyses
+        items = batch_get([
+            {'player': pk, 'year#feature': sk},
+            {'player': pk1, 'year#feature': '2025#SAW'},
+            {'player': pk2, 'year#feature': '2025#SAW'},
+        ])
+        item = items.get((pk, sk))
+        saw_items = [items.get((pk1, '2025#SAW')), items.get((pk2, '2025#SAW'))]
+
+        # Background refresh started by a stale read: recompute under the lease we were handed
+        if event.get('cacheRefreshLease'):
+            try:
+                with lease.LeaseKeeper(table, pk, sk, event['cacheRefreshLease']):
+                    status_code, body = run_comparison(players, saw_items, pk, sk, refreshing=True)
+            finally:
+                lease.release_lease(table, pk, sk, event['cacheRefreshLease'])
+            return format_response(status_code, body, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+
+        # if fresh then return cache; if stale return it and refresh in the background
+        cache_status, age = cache_policy.classify(item, sk)
+        if cache_status != cache_policy.MISS:
+            print(f"Returning cached result from database ({cache_status}, {age}s old)")
+            if cache_status == cache_policy.STALE:
+                start_background_refresh(event, context, pk, sk)
+            clean_result = result_codec.decode(item['result'])
+            return format_response(200, clean_result, action_group, api_path, http_method, event, cache=(cache_status, age))
+
+
+        # Only the invocation holding the lease runs the comparison; concurrent requests wait for its result
+        token = lease.acquire_lease(table, pk, sk)
+        if token is None:
+            print("Another invocation is computing this comparison, waiting for it")
+            leader_result = wait_for_leader(pk, sk, context, newer_than=int(item['timestamp']) if item and 'timestamp' in item else None)
+            if leader_result is not None:
+                return format_response(200, leader_result, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+            return format_response(202, {'status': 'computing', 'message': 'This comparison is still being computed, try again shortly'}, action_group, api_path, http_method, event)
+
+        try:
+            # If not cached, call the core comparison function
+            print("Cache miss, running new comparison")
+            with lease.LeaseKeeper(table, pk, sk, token):
+                status_code, body = run_comparison(players, saw_items, pk, sk)
+        finally:
+            lease.release_lease(table, pk, sk, token)
+        return format_response(status_code, body, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+
+    except RiotIdNotFound as e:
+        print(f"Player not found: {str(e)}")
+        return format_response(404, {'error': f'Player not found: {str(e)}'}, action_group, api_path, http_method, event)
 
     except Exception as e:
         print(f"Exception occurred: {str(e)}")
@@ -154,7 +256,11 @@ def lambda_handler(event, context):
 
 # format the response to match the OpenAPI schema
 # (Copied from your template)
-def format_response(status_code, body_dict, action_group, api_path, http_method, event):
+# cache is (status, age in seconds); Bedrock responses have no headers, so it goes into the session attributes
+def format_response(status_code, body_dict, action_group, api_path, http_method, event, cache=None):
+    session_attributes = dict(event.get('sessionAttributes') or {})
+    if cache:
+        session_attributes.update({'cacheStatus': cache[0], 'cacheAge': str(cache[1])})
     return {
         'messageVersion': '1.0',
         'response': {
@@ -168,6 +274,6 @@ def format_response(status_code, body_dict, action_group, api_path, http_method,
                 }
             }
         },
-        'sessionAttributes': event.get('sessionAttributes', {}),
+        'sessionAttributes': session_attributes,
         'promptSessionAttributes': event.get('promptSessionAttributes', {})
     }
\ No newline at end of file
@@ -2,7 +2,7 @@
 # This module handles fetching data from the SUMMONER-V4 API endpoints.
 # Base URL: https://{platform}.api.riotgames.com (platform: na1, euw1, etc.)
 
-import requests
+from riot_http import riot_get
 
 def get_summoner_by_name(api_key: str, platform: str, summoner_name: str) -> dict:
     """
@@ -15,7 +15,7 @@ def get_summoner_by_name(api_key: str, platform: str, summoner_name: str) -> dic
     """
     url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-name/{summoner_name}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "summoner-v4.getBySummonerName", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -32,7 +32,7 @@ def get_summoner_by_puuid(api_key: str, platform: str, puuid: str) -> dict:
     """
     url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "summoner-v4.getByPUUID", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -49,7 +49,7 @@ def get_summoner_by_account_id(api_key: str, platform: str, account_id: str) ->
     """
     url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-account/{account_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "summoner-v4.getByAccountId", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -66,7 +66,7 @@ def get_summoner_by_summoner_id(api_key: str, platform: str, summoner_id: str) -
     """
     url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/{summoner_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "summoner-v4.getBySummonerId", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
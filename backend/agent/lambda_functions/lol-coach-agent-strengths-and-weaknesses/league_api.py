@@ -2,7 +2,7 @@
 # This module handles fetching data from the LEAGUE-V4 API endpoints.
 # Base URL: https://{platform}.api.riotgames.com (platform: na1, euw1, etc.)
 
-import requests
+from riot_http import riot_get
 
 def get_league_entries_for_summoner(api_key: str, platform: str, summoner_id: str) -> list:
     """
@@ -15,7 +15,7 @@ def get_league_entries_for_summoner(api_key: str, platform: str, summoner_id: st
     """
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/entries/by-summoner/{summoner_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "league-v4.getLeagueEntriesForSummoner", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -32,7 +32,7 @@ def get_challenger_league(api_key: str, platform: str, queue: str = "RANKED_SOLO
     """
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/challengerleagues/by-queue/{queue}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "league-v4.getChallengerLeague", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -49,7 +49,7 @@ def get_grandmaster_league(api_key: str, platform: str, queue: str = "RANKED_SOL
     """
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/grandmasterleagues/by-queue/{queue}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "league-v4.getGrandmasterLeague", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -66,7 +66,7 @@ def get_master_league(api_key: str, platform: str, queue: str = "RANKED_SOLO_5x5
     """
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/masterleagues/by-queue/{queue}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "league-v4.getMasterLeague", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -83,7 +83,7 @@ def get_league_by_id(api_key: str, platform: str, league_id: str) -> dict:
     """
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/leagues/{league_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "league-v4.getLeagueById", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -104,7 +104,7 @@ def get_league_entries(api_key: str, platform: str, queue: str, tier: str, divis
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/entries/{queue}/{tier}/{division}"
     params = {"page": page}
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers, params=params)
+    response = riot_get(url, "league-v4.getLeagueEntries", headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
@@ -2,7 +2,7 @@
 # This module handles fetching data from the CHAMPION-MASTERY-V4 API endpoints.
 # Base URL: https://{platform}.api.riotgames.com (platform: na1, euw1, etc.)
 
-import requests
+from riot_http import riot_get
 
 def get_all_champion_masteries(api_key: str, platform: str, summoner_id: str) -> list:
     """
@@ -15,7 +15,7 @@ def get_all_champion_masteries(api_key: str, platform: str, summoner_id: str) ->
     """
     url = f"https://{platform}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-summoner/{summoner_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "champion-mastery-v4.getAllChampionMasteries", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -33,7 +33,7 @@ def get_champion_mastery_by_champion(api_key: str, platform: str, summoner_id: s
     """
     url = f"https://{platform}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-summoner/{summoner_id}/by-champion/{champion_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "champion-mastery-v4.getChampionMastery", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -50,7 +50,7 @@ def get_mastery_scores(api_key: str, platform: str, summoner_id: str) -> int:
     """
     url = f"https://{platform}.api.riotgames.com/lol/champion-mastery/v4/scores/by-summoner/{summoner_id}"
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers)
+    response = riot_get(url, "champion-mastery-v4.getChampionMasteryScore", headers=headers)
     if response.status_code == 200:
         return response.json()
     else:
@@ -69,7 +69,7 @@ def get_top_champion_masteries(api_key: str, platform: str, puuid: str, count: i
     url = f"https://{platform}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top"
     params = {"count": count}
     headers = {"X-Riot-Token": api_key}
-    response = requests.get(url, headers=headers, params=params)
+    response = riot_get(url, "champion-mastery-v4.getTopChampionMasteriesByPUUID", headers=headers, params=params)
     if response.status_code == 200:
         return response.json()
     else:
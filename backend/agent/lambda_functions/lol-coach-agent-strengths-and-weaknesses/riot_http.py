@@ -0,0 +1,21 @@
+# riot_http.py
+# Shared GET helper for the *_api.py modules.
+# Requests go through the process-wide RiotClient (riot_client.py): a pooled keep-alive session
+# that waits on the shared rate limiter before sending, so concurrent callers reuse connections
+# and queue locally instead of running into 429s.
+
+import requests
+from riot_client import client
+
+def riot_get(url: str, method: str, headers: dict = None, params: dict = None, max_retries: int = 3) -> requests.Response:
+    """
+    Sends a GET request to the Riot API through the shared client.
+
+    :param url: Full request URL
+    :param method: Riot method name (e.g. 'match-v5.getMatch'), used as the method rate-limit bucket
+    :param headers: Request headers (X-Riot-Token)
+    :param params: Query parameters
+    :param max_retries: Attempts made when Riot still answers 429
+    :return: The last response object
+    """
+    return client.get(url, method, headers=headers, params=params, max_retries=max_retries)
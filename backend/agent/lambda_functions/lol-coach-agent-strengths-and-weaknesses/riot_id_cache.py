@@ -0,0 +1,236 @@
+# riot_id_cache.py
+# Riot ID -> account (PUUID) resolution cache, plus the permanent PUUID -> platform mapping.
+#
+# Every summary and analysis starts with an account-v1 by-riot-id lookup. Resolved IDs are
+# kept in warm-container memory and persisted to the playerUserData table (one small item per
+# normalized gameName#tagLine#region, expired by DynamoDB TTL), so repeat players cost no Riot
+# call. Riot IDs can be renamed, hence a finite RIOT_ID_CACHE_TTL (7 days by default).
+#
+# 404s are remembered in-process only, in a rotating pair of bloom filters: memory stays fixed
+# however many typoed IDs are retried, and a remembered miss is forgotten after one to two
+# RIOT_ID_NEGATIVE_TTL periods (5 minutes by default). A remembered miss is answered without
+# leaving the process; a bloom false positive could hide a real player for that long, so the
+# in-memory positive cache is always checked first.
+#
+# A PUUID's platform never changes, so once discovered it is stored without expiry.
+
+import hashlib
+import math
+import os
+import threading
+import time
+import requests
+
+POSITIVE_TTL_SECONDS = int(os.getenv("RIOT_ID_CACHE_TTL", str(7 * 24 * 60 * 60)))
+NEGATIVE_TTL_SECONDS = int(os.getenv("RIOT_ID_NEGATIVE_TTL", str(5 * 60)))
+MAX_MEMORY_ENTRIES = 10000
+
+SNAPSHOT_SORT_KEY = "v1#RIOT_ID"
+PLATFORM_SORT_KEY = "v1#PLATFORM"
+
+
+class RiotIdNotFound(requests.exceptions.HTTPError):
+    """The Riot ID does not exist (404 from account-v1, possibly remembered from an earlier call)."""
+
+
+def normalize(game_name, tag_line, region):
+    # Riot IDs are case-insensitive and users paste them with stray spaces
+    return f"{game_name.strip().lower()}#{tag_line.strip().lower()}#{region.strip().lower()}"
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, about `error_rate` false positives at capacity."""
+
+    def __init__(self, capacity=10000, error_rate=0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: position_i = h1 + i * h2
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, key):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(key))
+
+
+class NegativeCache:
+    """Remembers keys for between ttl and 2 * ttl seconds using two rotating bloom filters."""
+
+    def __init__(self, ttl, capacity=10000, error_rate=0.001):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.time()
+
+    def _rotate(self):
+        elapsed = time.time() - self._rotated_at
+        if elapsed < self.ttl:
+            return
+        self._previous = self._current if elapsed < 2 * self.ttl else BloomFilter(self.capacity, self.error_rate)
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = time.time()
+
+    def add(self, key):
+        self._rotate()
+        self._current.add(key)
+
+    def __contains__(self, key):
+        self._rotate()
+        return key in self._current or key in self._previous
+
+
+_lock = threading.Lock()
+_accounts = {}  # normalized Riot ID -> {"account": {...}, "resolvedAt": epoch}
+_platforms = {}  # PUUID -> platform
+_missing = NegativeCache(NEGATIVE_TTL_SECONDS)
+_table = None
+
+
+def _snapshot_table():
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource("dynamodb").Table(os.getenv("DYNAMODB_TABLE", "playerUserData"))
+    return _table
+
+
+def _key(normalized):
+    return {"player": f"riotid#{normalized}", "year#feature": SNAPSHOT_SORT_KEY}
+
+
+def _load(normalized):
+    try:
+        item = _snapshot_table().get_item(Key=_key(normalized)).get("Item")
+    except Exception as e:
+        print(f"Riot ID cache read failed for {normalized}: {e}")
+        return None
+    if not item:
+        return None
+    return {
+        "account": {"puuid": item["puuid"], "gameName": item["gameName"], "tagLine": item["tagLine"]},
+        "resolvedAt": int(item["timestamp"]),
+    }
+
+
+def _save(normalized, entry):
+    item = {
+        **_key(normalized),
+        "puuid": entry["account"]["puuid"],
+        "gameName": entry["account"].get("gameName", ""),
+        "tagLine": entry["account"].get("tagLine", ""),
+        "timestamp": entry["resolvedAt"],
+        "expiresAt": entry["resolvedAt"] + POSITIVE_TTL_SECONDS,  # DynamoDB TTL attribute
+    }
+    try:
+        _snapshot_table().put_item(Item=item)
+    except Exception as e:
+        print(f"Riot ID cache write failed for {normalized}: {e}")
+
+
+def _remember(normalized, entry):
+    with _lock:
+        if normalized not in _accounts and len(_accounts) >= MAX_MEMORY_ENTRIES:
+            _accounts.pop(next(iter(_accounts)))  # oldest first
+        _accounts[normalized] = entry
+
+
+def _cached(normalized):
+    """The in-memory entry for a Riot ID if it is still fresh (no I/O)."""
+    with _lock:
+        entry = _accounts.get(normalized)
+    if entry and time.time() - entry["resolvedAt"] < POSITIVE_TTL_SECONDS:
+        return entry
+    return None
+
+
+def _stored(normalized):
+    """The persisted entry for a Riot ID if it is still fresh; kept in memory from then on."""
+    entry = _load(normalized)
+    if entry and time.time() - entry["resolvedAt"] < POSITIVE_TTL_SECONDS:
+        _remember(normalized, entry)
+        return entry
+    return None
+
+
+def resolve(game_name, tag_line, region, lookup):
+    """
+    Returns the account dict ({"puuid", "gameName", "tagLine"}) for a Riot ID.
+
+    lookup() performs the account-v1 call and returns the Response; it is only called on a
+    cache miss. Raises RiotIdNotFound for IDs that do not exist (remembered briefly).
+    """
+    normalized = normalize(game_name, tag_line, region)
+    entry = _cached(normalized)
+    if entry:
+        return dict(entry["account"])
+
+    # A remembered miss is answered before any I/O; the in-memory check above already rules
+    # out a bloom false positive for IDs this container has resolved
+    with _lock:
+        known_missing = normalized in _missing
+    if known_missing:
+        raise RiotIdNotFound(f"Riot ID {game_name}#{tag_line} not found (cached)")
+
+    entry = _stored(normalized)
+    if entry:
+        return dict(entry["account"])
+
+    response = lookup()
+    if response.status_code == 404:
+        with _lock:
+            _missing.add(normalized)
+        raise RiotIdNotFound(f"Riot ID {game_name}#{tag_line} not found", response=response)
+    response.raise_for_status()
+
+    account = response.json()
+    entry = {"account": account, "resolvedAt": int(time.time())}
+    _remember(normalized, entry)
+    _save(normalized, entry)
+    return dict(account)
+
+
+def get_puuid_platform(puuid):
+    """Platform a PUUID was previously found on, or None."""
+    with _lock:
+        platform = _platforms.get(puuid)
+    if platform:
+        return platform
+    try:
+        item = _snapshot_table().get_item(Key={"player": f"puuid#{puuid}", "year#feature": PLATFORM_SORT_KEY}).get("Item")
+    except Exception as e:
+        print(f"Platform mapping read failed for {puuid}: {e}")
+        return None
+    if not item:
+        return None
+    with _lock:
+        _platforms[puuid] = item["platform"]
+    return item["platform"]
+
+
+def remember_puuid_platform(puuid, platform):
+    """Stores the platform a PUUID's summoner lives on (no expiry)."""
+    with _lock:
+        if _platforms.get(puuid) == platform:
+            return
+        if len(_platforms) >= MAX_MEMORY_ENTRIES:
+            _platforms.pop(next(iter(_platforms)))
+        _platforms[puuid] = platform
+    try:
+        _snapshot_table().put_item(Item={
+            "player": f"puuid#{puuid}",
+            "year#feature": PLATFORM_SORT_KEY,
+            "platform": platform,
+            "timestamp": int(time.time()),
+        })
+    except Exception as e:
+        print(f"Platform mapping write failed for {puuid}: {e}")
@@ -0,0 +1,38 @@
+# routing.py
+# Maps match IDs to the regional cluster that serves them.
+#
+# Every MATCH-V5 ID starts with the platform it was played on ("NA1_5394780916", "SG2_...",
+# "KR_..."), which fixes the regional host regardless of what region the caller assumed.
+# Routing by the prefix means a match request never goes to the wrong host.
+
+PLATFORM_TO_REGION = {
+    'na1': 'americas',
+    'br1': 'americas',
+    'la1': 'americas',
+    'la2': 'americas',
+    'euw1': 'europe',
+    'eun1': 'europe',
+    'tr1': 'europe',
+    'ru': 'europe',
+    'me1': 'europe',
+    'kr': 'asia',
+    'jp1': 'asia',
+    # OCE match history moved to the sea cluster, even though its accounts route via americas
+    'oc1': 'sea',
+    'sg2': 'sea',
+    'ph2': 'sea',
+    'th2': 'sea',
+    'tw2': 'sea',
+    'vn2': 'sea',
+}
+
+
+def platform_for_match_id(match_id):
+    """'EUW1_7123456789' -> 'euw1' (None when the ID has no platform prefix)"""
+    prefix, sep, _ = match_id.partition("_")
+    return prefix.lower() if sep else None
+
+
+def region_for_match_id(match_id, default=None):
+    """Regional routing value for a match ID, or default when the prefix is unknown."""
+    return PLATFORM_TO_REGION.get(platform_for_match_id(match_id), default)
@@ -1,9 +1,13 @@
 import json
 import os
 from strengths_weaknesses import analyze_strengths_weaknesses
+from riot_client import client
+import lease
+import cache_policy
+import result_codec
+from riot_id_cache import RiotIdNotFound
 import boto3
 import time
-from decimal import Decimal
 
 
 # The "structured" event sent by the ai agent is specified to look like this:
@@ -28,28 +32,68 @@ dynamodb = boto3.resource('dynamodb')
 
 table_name = os.getenv("DYNAMODB_TABLE", "playerUserData")
 table = dynamodb.Table(table_name)
-
-#dynamoDB doenst support storing float, so this helps to convert every  float to decimal
-def convert_floats_to_decimal(obj):
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: convert_floats_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_floats_to_decimal(v) for v in obj]
-    else:
-        return obj
-    
-# convert the decimal back to float
-def convert_decimal_to_float(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: convert_decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_decimal_to_float(v) for v in obj]
-    else:
-        return obj
+lambda_client = boto3.client('lambda')
+
+# Results are stored as compressed binary blobs (see result_codec), which also keeps floats
+# out of DynamoDB's Decimal numbers; result_codec.decode still reads the old nested-map items
+
+# How long a request without the compute lease waits for the leader's result before answering 202
+LEASE_WAIT_SECONDS = 20
+
+def wait_for_leader(pk, sk, context, newer_than=None):
+    """Waits (with backoff) for the invocation holding the lease to store its result; returns it or None."""
+    wait = LEASE_WAIT_SECONDS
+    if context is not None:
+        wait = min(wait, context.get_remaining_time_in_millis() / 1000 - 5)
+    item = lease.wait_for_result(table, {'player': pk, 'year#feature': sk}, wait, newer_than=newer_than)
+    return result_codec.decode(item['result']) if item else None
+
+# Re-invokes this Lambda asynchronously to recompute a stale entry; the new invocation inherits the lease
+def start_background_refresh(event, context, pk, sk):
+    if context is None or not hasattr(context, 'invoked_function_arn'):
+        return
+    token = lease.acquire_lease(table, pk, sk)
+    if token is None:
+        return  # another invocation is already recomputing it
+    try:
+        lambda_client.invoke(
+            FunctionName=context.invoked_function_arn,
+            InvocationType='Event',
+            Payload=json.dumps({**event, 'cacheRefreshLease': token})
+        )
+    except Exception as e:
+        print(f"Background refresh could not be started: {str(e)}")
+        lease.release_lease(table, pk, sk, token)
+
+# runs the analysis and stores it, returns (status code, body)
+def run_analysis(game_name, tagline, region, pk, sk):
+    # calling core analysis function and store result into dynamoDB
+    raw_analysis = analyze_strengths_weaknesses(game_name, tagline, region)
+    print("Riot connection pool: " + json.dumps(client.pool_stats()))
+
+    # if no data
+    if raw_analysis is None or 'error' in raw_analysis:
+        print("Analysis failed or returned no data")
+        return 404, raw_analysis or {'error': 'No data returned'}
+
+    # Else if got data save to DynamoDB
+    now = int(time.time())
+    table.put_item(Item={
+        # Partition key attribute
+        'player': pk,
+        # Sort key attribute
+        'year#feature': sk,
+        # auto adds new attributes 
+        'result': result_codec.encode(raw_analysis),
+        'timestamp': now,
+        # DynamoDB TTL attribute (hard expiry)
+        'expiresAt': cache_policy.expires_at(sk, now)
+    })
+
+    # else if got data, print results
+    print ("Stored new results in DynamoDB")
+    print("Analysis result: " + json.dumps(raw_analysis))
+    return 200, raw_analysis
 
 def lambda_handler(event, context):
     print("Event received: " + json.dumps(event))  # Debug log
@@ -89,44 +133,56 @@ def lambda_handler(event, context):
     sk = "2025#SAW"
 
     try:
-        # Check DynamoDB cache, if got then return cache
-        cached = table.get_item(Key={'player': pk, 'year#feature': sk})
-        if 'Item' in cached and 'result' in cached['Item']:
-            print("Returning cached result from database")
-            clean_result = convert_decimal_to_float(cached['Item']['result'])
-            return format_response(200, clean_result, action_group, api_path, http_method, event)
-
-
-        # calling core analysis function and store result into dynamoDB
-        raw_analysis = analyze_strengths_weaknesses(game_name, tagline, region)
-
-        # if no data
-        if raw_analysis is None or 'error' in raw_analysis:
-            print("Analysis failed or returned no data")
-            return format_response(404, raw_analysis or {'error': 'No data returned'}, action_group, api_path, http_method, event)
-        
-        # Else if got data save to DynamoDB
-        table.put_item(Item={
-            # Partition key attribute
-            'player': pk,
-            # Sort key attribute
-            'year#feature': sk,
-            # auto adds new attributes 
-            'result': convert_floats_to_decimal(raw_analysis),
-            'timestamp': int(time.time())
-        })
-
-        # else if got data, print results
-        print ("Stored new results in DynamoDB")
-        print("Analysis result: " + json.dumps(raw_analysis))
-        return format_response(200, raw_analysis, action_group, api_path, http_method, event)
+        # Background refresh started by a stale read: recompute under the lease we were handed
+        if event.get('cacheRefreshLease'):
+            try:
+                with lease.LeaseKeeper(table, pk, sk, event['cacheRefreshLease']):
+                    status_code, body = run_analysis(game_name, tagline, region, pk, sk)
+            finally:
+                lease.release_lease(table, pk, sk, event['cacheRefreshLease'])
+            return format_response(status_code, body, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+
+        # Check DynamoDB cache, if fresh then return cache; if stale return it and refresh in the background
+        item = table.get_item(Key={'player': pk, 'year#feature': sk}).get('Item')
+        cache_status, age = cache_policy.classify(item, sk)
+        if cache_status != cache_policy.MISS:
+            print(f"Returning cached result from database ({cache_status}, {age}s old)")
+            if cache_status == cache_policy.STALE:
+                start_background_refresh(event, context, pk, sk)
+            clean_result = result_codec.decode(item['result'])
+            return format_response(200, clean_result, action_group, api_path, http_method, event, cache=(cache_status, age))
+
+
+        # Only the invocation holding the lease runs the analysis; concurrent requests wait for its result
+        token = lease.acquire_lease(table, pk, sk)
+        if token is None:
+            print("Another invocation is computing this analysis, waiting for it")
+            leader_result = wait_for_leader(pk, sk, context, newer_than=int(item['timestamp']) if item and 'timestamp' in item else None)
+            if leader_result is not None:
+                return format_response(200, leader_result, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+            return format_response(202, {'status': 'computing', 'message': 'This analysis is still being computed, try again shortly'}, action_group, api_path, http_method, event)
+
+        try:
+            with lease.LeaseKeeper(table, pk, sk, token):
+                status_code, body = run_analysis(game_name, tagline, region, pk, sk)
+        finally:
+            lease.release_lease(table, pk, sk, token)
+        return format_response(status_code, body, action_group, api_path, http_method, event, cache=(cache_policy.MISS, 0))
+
+    except RiotIdNotFound as e:
+        print(f"Player not found: {str(e)}")
+        return format_response(404, {'error': f'Player not found: {str(e)}'}, action_group, api_path, http_method, event)
 
     except Exception as e:
         print(f"Exception occurred: {str(e)}")
         return format_response(500, {'error': str(e)}, action_group, api_path, http_method, event)
 
 # format the response to match the OpenAPI schema
-def format_response(status_code, body_dict, action_group, api_path, http_method, event):
+# cache is (status, age in seconds); Bedrock responses have no headers, so it goes into the session attributes
+def format_response(status_code, body_dict, action_group, api_path, http_method, event, cache=None):
+    session_attributes = dict(event.get('sessionAttributes') or {})
+    if cache:
+        session_attributes.update({'cacheStatus': cache[0], 'cacheAge': str(cache[1])})
     return {
         'messageVersion': '1.0',
         'response': {
@@ -140,6 +196,6 @@ def format_response(status_code, body_dict, action_group, api_path, http_method,
                 }
             }
         },
-        'sessionAttributes': event.get('sessionAttributes', {}),
+        'sessionAttributes': session_attributes,
         'promptSessionAttributes': event.get('promptSessionAttributes', {})
     }
\ No newline at end of file
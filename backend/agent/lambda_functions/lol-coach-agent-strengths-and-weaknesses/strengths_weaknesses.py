@@ -4,9 +4,15 @@ from match_api import get_match_ids_by_puuid, get_match_details
 from mastery_api import get_top_champion_masteries
 from summoner_api import get_summoner_by_puuid
 from account_api import get_account_by_riot_id
+import riot_id_cache
+import match_registry
+from match_table import (
+    AVAILABLE, RECENT_TABLE, project_participant, append_rows, load_player_table, save_player_table, saw_metrics
+)
 import os
 # import dotenv
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # dotenv.load_dotenv()
 api_key = os.environ.get("RIOT_API_KEY")
@@ -15,35 +21,61 @@ START_EPOCH_TIME_STAMP = 1730379600  # Nov 1, 2024
 END_EPOCH_TIME_STAMP = 1735461600  # Nov 1, 2025
 
 # just getting raw data and putting them into metrics[] from api calls
+# with pandas available, every match is projected into the player's columnar table of recent
+# matches (match_table.py), so only matches not already in the stored table are downloaded, and
+# the metrics are vectorized sums over it; without it they are summed over the projected rows.
+# in multi-player runs the downloads go through the shared match registry (match_registry.py)
 def get_raw_metrics(api_key, puuid, region):
-    metrics = defaultdict(int)
-    metrics['champion_variety'] = set() # use sets because each champion is unique, set removes duplicates
-    impact_list = []
-    total_matches_fetched = 0
-
     match_ids = get_match_ids_by_puuid(api_key, region, puuid, count=20, startTime=START_EPOCH_TIME_STAMP, endTime=END_EPOCH_TIME_STAMP)
+
+    table = load_player_table(puuid, RECENT_TABLE)[0] if AVAILABLE else None
+    known = set(table['matchId']) if table is not None else set()
+    registry = match_registry.get_registry()
+    rows = []
     for match_id in match_ids:
-        match = get_match_details(api_key, region, match_id)
-        info = match['info']
-        metadata = match['metadata']
-        idx = metadata['participants'].index(puuid)
-        p = info['participants'][idx]
+        if match_id in known:
+            continue
+        if registry is not None:
+            row = registry.participant_row(
+                match_id, puuid, lambda match_id, puuids: get_match_details(api_key, region, match_id, puuids)
+            )
+        else:
+            row = project_participant(get_match_details(api_key, region, match_id, {puuid}), puuid)
+        if row is not None:
+            rows.append(row)
 
-        metrics['total_games'] += 1
-        metrics['kills'] += p.get('kills', 0)
-        metrics['deaths'] += p.get('deaths', 0)
-        metrics['assists'] += p.get('assists', 0)
-        metrics['damage'] += p.get('totalDamageDealtToChampions', 0)
-        metrics['gold'] += p.get('goldEarned', 0)
-        metrics['cs'] += p.get('totalMinionsKilled', 0) + p.get('neutralMinionsKilled', 0)
-        metrics['vision'] += p.get('visionScore', 0)
-        metrics['wins'] += 1 if p.get('win') else 0
-        metrics['champion_variety'].add(p.get('championName', 'Unknown'))
-        impact_list.append(p.get('kills', 0) + p.get('assists', 0) - p.get('deaths', 0))
+    if not AVAILABLE:
+        return _sum_rows(rows)
+
+    if rows or table is None:
+        table = append_rows(table, rows)
+        if rows:
+            save_player_table(puuid, table, name=RECENT_TABLE)
+
+    recent = table[table['matchId'].isin(match_ids)].sort_values('gameCreation', ascending=False)
+    totals, impact_list = saw_metrics(recent)
+    metrics = defaultdict(int, totals)
 
-        total_matches_fetched += 1
+    return metrics, impact_list, len(recent)
+
+def _sum_rows(rows):
+    metrics = defaultdict(int)
+    metrics['champion_variety'] = set() # use sets because each champion is unique, set removes duplicates
+    impact_list = []
+    for row in rows:
+        metrics['total_games'] += 1
+        metrics['kills'] += row['kills']
+        metrics['deaths'] += row['deaths']
+        metrics['assists'] += row['assists']
+        metrics['damage'] += row['damage']
+        metrics['gold'] += row['gold']
+        metrics['cs'] += row['cs']
+        metrics['vision'] += row['vision']
+        metrics['wins'] += 1 if row['win'] else 0
+        metrics['champion_variety'].add(row['championName'])
+        impact_list.append(row['kills'] + row['assists'] - row['deaths'])
 
-    return metrics, impact_list, total_matches_fetched
+    return metrics, impact_list, len(rows)
 
 # derived metrics from raw metrics, impact_list, mastery_data
 def get_derived_metrics(metrics, impact_list, mastery_data):
@@ -171,32 +203,51 @@ REGION_TO_PLATFORMS = {
     'sea': ['sg2', 'ph2', 'th2', 'tw2', 'vn2']
 }
 
+# returns (platform, summoner) for the player, (None, None) if no platform of the region knows them
 def find_valid_platform(api_key, puuid, region):
     platforms = REGION_TO_PLATFORMS.get(region.lower(), [])
-    for platform in platforms:
-        try:
-            get_summoner_by_puuid(api_key, platform, puuid)  # Just test if it works
-            return platform # returns the first platform found , 
-        except requests.exceptions.HTTPError:
-            continue
-    return None
+
+    # a PUUID never moves platform, so a mapping found once is reused forever
+    known = riot_id_cache.get_puuid_platform(puuid)
+    if known in platforms:
+        return known, get_summoner_by_puuid(api_key, known, puuid)
+
+    # probe every platform of the region at once, the first one that knows the summoner wins
+    if not platforms:
+        return None, None
+    executor = ThreadPoolExecutor(max_workers=len(platforms))
+    try:
+        probes = {executor.submit(get_summoner_by_puuid, api_key, platform, puuid): platform for platform in platforms}
+        for probe in as_completed(probes):
+            try:
+                summoner = probe.result()
+            except requests.exceptions.HTTPError:
+                continue
+            platform = probes[probe]
+            riot_id_cache.remember_puuid_platform(puuid, platform)
+            return platform, summoner # returns the first platform found
+    finally:
+        # do not wait for the losing probes
+        executor.shutdown(wait=False, cancel_futures=True)
+    return None, None
+
+
+def resolve_puuid(game_name, tag_line, region):
+    # riot api doesnt have sea region for account v1 api call, so use asia for account v1, but remains sea for other apis
+    account_region = 'asia' if region == 'sea' else region
+    return get_account_by_riot_id(api_key, account_region, game_name, tag_line)['puuid']
 
 
 def analyze_strengths_weaknesses(game_name, tag_line, region):
     # dont use this 
     # region = platform_to_region(platform)
 
-    # riot api doesnt have sea region for account v1 api call, so use asia for account v1, but remains sea for other apis
-    account_region = 'asia' if region == 'sea' else region
-    account = get_account_by_riot_id(api_key, account_region, game_name, tag_line)
-    
-    puuid = account['puuid']
-    # find valid platforms
-    platform = find_valid_platform(api_key, puuid, region)
+    puuid = resolve_puuid(game_name, tag_line, region)
+    # find valid platforms, the winning probe's summoner is reused for the profile fields
+    platform, summoner = find_valid_platform(api_key, puuid, region)
     if not platform:
         return {"error": "Unable to resolve platform for this region and player."}
 
-    summoner = get_summoner_by_puuid(api_key, platform, puuid)
     mastery_data = get_top_champion_masteries(api_key, platform, puuid, count=5)
 
     raw_metrics, impact_list, total_matches_fetched = get_raw_metrics(api_key, puuid, region)
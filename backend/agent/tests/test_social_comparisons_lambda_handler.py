@@ -0,0 +1,130 @@
+"""
+Cache-miss path of the social-comparisons Lambda: neither the comparison nor either player's
+SAW analysis is cached, so both players are analyzed (through the shared match registry) and
+all three results are stored. Riot and DynamoDB are stubbed.
+
+    python -m pytest backend/agent/tests
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+import requests
+
+LAMBDA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "lambda_functions", "lol-coach-agent-social-comparisons",
+)
+sys.path.insert(0, LAMBDA_DIR)
+
+with mock.patch("boto3.resource"), mock.patch("boto3.client"):
+    import social_comparisons_lambda_handler as handler
+import match_table
+import strengths_weaknesses
+
+PUUIDS = {"PlayerOne": "puuid-one", "PlayerTwo": "puuid-two"}
+MATCH_IDS = [f"NA1_{1000 + i}" for i in range(20)]
+
+
+def fake_match(match_id):
+    """A duo game: both players on team 100, with eight strangers."""
+    n = int(match_id.split("_")[1])
+    puuids = ["puuid-one", "puuid-two"] + [f"other-{n}-{i}" for i in range(8)]
+    participants = [
+        {
+            "puuid": puuid, "teamId": 100 if i < 5 else 200, "win": (n + i) % 2 == 0,
+            "championName": ["Ahri", "Jinx", "Thresh"][(n + i) % 3], "individualPosition": "MIDDLE",
+            "kills": n % 7 + i, "deaths": n % 5, "assists": n % 9, "pentaKills": 0, "quadraKills": 0,
+            "tripleKills": 0, "totalMinionsKilled": 150, "neutralMinionsKilled": 10, "goldEarned": 11000,
+            "totalDamageDealtToChampions": 20000, "visionScore": 30, "riotIdGameName": puuid,
+            "riotIdTagline": "NA1",
+        }
+        for i, puuid in enumerate(puuids)
+    ]
+    return {
+        "metadata": {"matchId": match_id, "participants": puuids},
+        "info": {"gameCreation": 1735689600000 + n * 1000, "gameDuration": 1800, "participants": participants},
+    }
+
+
+def bedrock_event():
+    values = {
+        "game_name_1": "PlayerOne", "tagline_1": "NA1", "region_1": "americas",
+        "game_name_2": "PlayerTwo", "tagline_2": "NA1", "region_2": "americas",
+    }
+    return {
+        "actionGroup": "SocialComparisonsActionGroup",
+        "apiPath": "/compare",
+        "httpMethod": "POST",
+        "requestBody": {"content": {"application/json": {
+            "properties": [{"name": name, "value": value} for name, value in values.items()]
+        }}},
+    }
+
+
+class CacheMissTest(unittest.TestCase):
+    def setUp(self):
+        self.details_calls = []
+        self.summoner_calls = []
+
+        def get_summoner_by_puuid(api_key, platform, puuid):
+            # both players live on na1, the other americas platforms answer 404
+            self.summoner_calls.append((platform, puuid))
+            if platform != "na1":
+                raise requests.exceptions.HTTPError(f"404 on {platform}")
+            return {"summonerLevel": 300, "profileIconId": 7}
+
+        def get_match_details(api_key, region, match_id, puuids=None):
+            self.details_calls.append(match_id)
+            return fake_match(match_id)
+
+        riot = {
+            "get_account_by_riot_id": lambda api_key, region, game_name, tag_line: {
+                "puuid": PUUIDS[game_name], "gameName": game_name, "tagLine": tag_line
+            },
+            "get_summoner_by_puuid": get_summoner_by_puuid,
+            "get_top_champion_masteries": lambda api_key, platform, puuid, count=5: [
+                {"championId": 103, "championLevel": 7, "championPoints": 90000}
+            ],
+            "get_match_ids_by_puuid": lambda api_key, region, puuid, **kwargs: list(MATCH_IDS),
+            "get_match_details": get_match_details,
+        }
+        patches = [mock.patch.object(strengths_weaknesses, name, fn) for name, fn in riot.items()]
+        patches += [
+            mock.patch.object(strengths_weaknesses.riot_id_cache, "get_puuid_platform", return_value=None),
+            mock.patch.object(strengths_weaknesses.riot_id_cache, "remember_puuid_platform"),
+            mock.patch.object(match_table, "_table_store", return_value=None),
+            mock.patch.object(handler, "table"),
+            mock.patch.object(handler, "dynamodb"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        handler.dynamodb.batch_get_item.return_value = {"Responses": {handler.table_name: []}}
+        self.batch = handler.table.batch_writer.return_value.__enter__.return_value
+
+    def test_analyzes_both_players_and_stores_every_result(self):
+        response = handler.lambda_handler(bedrock_event(), None)["response"]
+        body = json.loads(response["responseBody"]["application/json"]["body"])
+
+        self.assertEqual(response["httpStatusCode"], 200, body)
+        stored = {
+            call.kwargs["Item"]["player"]: call.kwargs["Item"]["year#feature"]
+            for call in self.batch.put_item.call_args_list
+        }
+        self.assertEqual(stored, {
+            "PlayerOne#NA1#americas": "2025#SAW",
+            "PlayerTwo#NA1#americas": "2025#SAW",
+            "PlayerOne#NA1#americas##PlayerTwo#NA1#americas": "2025#COMP",
+        })
+        # Every match is shared by the duo, so the registry downloads each one once
+        self.assertEqual(sorted(self.details_calls), MATCH_IDS)
+        # The winning platform probe's summoner is reused, not fetched again
+        self.assertEqual(sorted(c for c in self.summoner_calls if c[0] == "na1"), [("na1", "puuid-one"), ("na1", "puuid-two")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,362 @@
+# ladder_runner.py
+# Batch entry point that warms the playerUserData cache for a whole ladder segment, so the
+# year-end summary (YES) and strengths-and-weaknesses (SAW) results of top players are already
+# stored before traffic arrives.
+#
+#     RIOT_API_KEY=... python ladder_runner.py sg2 challenger
+#     RIOT_API_KEY=... python ladder_runner.py euw1 DIAMOND:I --limit 500 --yes-workers 6
+#     RIOT_API_KEY=... python ladder_runner.py kr grandmaster --features SAW --checkpoint gm-kr.json
+#
+# The segment is crawled with league_api (challenger/grandmaster/master leagues, or the paged
+# entries of a tier:division), each PUUID is resolved to its Riot ID, and every player is then
+# computed by the Lambdas' own code (lambda_function.compute_summary, saw_lambda_handler.run_analysis)
+# in process pools, so results land under the same keys with the same TTLs. Entries that are
+# still fresh, or being computed by a live request (compute lease held), are skipped.
+#
+# YES and SAW modules share names (riot_client, rate_limiter, match_table, ...), so each
+# feature gets its own pool whose workers only have that Lambda's directory on sys.path.
+# All processes use one Riot key: RIOT_RATE_LIMIT_SHARE (the fraction of the key this run may
+# use, 1 by default) is split evenly between the crawler and every worker process.
+#
+# SAW workers download matches through a match registry (match_registry.py) tracking every
+# player of the segment: a match shared by ladder players is fetched once per worker and its
+# rows fanned out to all of them. Year-end summaries fold whole payloads and are not routed
+# through it; across processes they share the match content cache (MATCH_CACHE_URL) instead.
+#
+# Progress is written to a JSON checkpoint after every finished player; rerunning the same
+# command resumes from it. Throughput is reported as players per minute, Riot calls per player
+# and match downloads saved by the registry.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+API_KEY = os.getenv("RIOT_API_KEY")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEATURE_DIRS = {
+    "YES": os.path.join(BACKEND_DIR, "yearEndSum"),
+    "SAW": os.path.join(BACKEND_DIR, "agent", "lambda_functions", "lol-coach-agent-strengths-and-weaknesses"),
+}
+
+APEX_TIERS = ("challenger", "grandmaster", "master")
+QUEUE = "RANKED_SOLO_5x5"
+CHECKPOINT_VERSION = 1
+
+# Outcomes of one (player, feature)
+WARMED = "warmed"
+CACHED = "cached"  # already fresh in playerUserData
+BUSY = "busy"  # another invocation holds the compute lease
+FAILED = "failed"
+
+# Seconds between throughput reports
+REPORT_INTERVAL = 30
+
+
+# --- Workers (run in the feature pools) ---
+
+def _init_worker(source_dir, rate_share, tracked=None):
+    # Runs before the worker imports anything from the Lambda: rate_limiter reads the share at import
+    os.environ["RIOT_RATE_LIMIT_SHARE"] = str(rate_share)
+    sys.path.insert(0, source_dir)
+    if tracked is not None:
+        import match_registry
+        match_registry.set_registry(match_registry.MatchRegistry(tracked))
+
+
+def _warm_yes(game_name, tag_line, region):
+    import lambda_function
+    import cache_policy
+    import lease
+    pk = f"{game_name}#{tag_line}#{region}"
+    sk = lambda_function.feature_key(lambda_function.DEFAULT_WINDOW_ID)
+    item = lambda_function.table.get_item(Key={"player": pk, "year#feature": sk}).get("Item")
+    if cache_policy.classify(item, sk)[0] == cache_policy.HIT:
+        return CACHED
+    token = lease.acquire_lease(lambda_function.table, pk, sk)
+    if token is None:
+        return BUSY
+    try:
+        # The aggregate state outlives the cached result, so only new matches are fetched
+        with lease.LeaseKeeper(lambda_function.table, pk, sk, token):
+            lambda_function.compute_summary(game_name, tag_line, region)
+    finally:
+        lease.release_lease(lambda_function.table, pk, sk, token)
+    return WARMED
+
+
+def _warm_saw(game_name, tag_line, region):
+    import saw_lambda_handler
+    import cache_policy
+    import lease
+    pk = f"{game_name}#{tag_line}#{region}"
+    sk = "2025#SAW"
+    item = saw_lambda_handler.table.get_item(Key={"player": pk, "year#feature": sk}).get("Item")
+    if cache_policy.classify(item, sk)[0] == cache_policy.HIT:
+        return CACHED
+    token = lease.acquire_lease(saw_lambda_handler.table, pk, sk)
+    if token is None:
+        return BUSY
+    try:
+        with lease.LeaseKeeper(saw_lambda_handler.table, pk, sk, token):
+            status_code, _ = saw_lambda_handler.run_analysis(game_name, tag_line, region, pk, sk)
+    finally:
+        lease.release_lease(saw_lambda_handler.table, pk, sk, token)
+    return WARMED if status_code == 200 else FAILED
+
+
+WARMERS = {"YES": _warm_yes, "SAW": _warm_saw}
+
+
+def _downloads_saved():
+    if "match_registry" not in sys.modules:
+        return 0
+    registry = sys.modules["match_registry"].get_registry()
+    return registry.stats()["saved"] if registry is not None else 0
+
+
+def warm(feature, puuid, game_name, tag_line, region, platform):
+    """
+    Computes and stores one player's result; returns (outcome, Riot calls made, match downloads
+    saved by the registry, error or None).
+    """
+    from riot_client import client
+    import riot_id_cache
+    before, saved_before = client.requests_sent, _downloads_saved()
+    try:
+        # The player was crawled on this platform: store it as the PUUID's platform, so the Lambda
+        # code looks the summoner up there instead of on the region's first platform
+        riot_id_cache.remember_puuid_platform(puuid, platform)
+        outcome, error = WARMERS[feature](game_name, tag_line, region), None
+    except Exception as e:
+        outcome, error = FAILED, str(e)
+    return outcome, client.requests_sent - before, _downloads_saved() - saved_before, error
+
+
+# --- Crawl (runs in the main process, with the SAW directory on sys.path for league_api) ---
+
+def crawl_segment(platform, segment, limit):
+    """Players of a ladder segment, best first: [{"puuid", "leaguePoints"}]."""
+    import league_api
+
+    if segment.lower() in APEX_TIERS:
+        fetch = getattr(league_api, f"get_{segment.lower()}_league")
+        entries = fetch(API_KEY, platform, QUEUE).get("entries", [])
+    else:
+        tier, _, division = segment.upper().partition(":")
+        entries, page = [], 1
+        while limit is None or len(entries) < limit:
+            batch = league_api.get_league_entries(API_KEY, platform, QUEUE, tier, division or "I", page)
+            if not batch:
+                break
+            entries.extend(batch)
+            page += 1
+
+    players = [{"puuid": e["puuid"], "leaguePoints": e.get("leaguePoints", 0)} for e in entries if e.get("puuid")]
+    if len(players) < len(entries):
+        print(f"Skipped {len(entries) - len(players)} entries without a PUUID")
+    players.sort(key=lambda p: p["leaguePoints"], reverse=True)
+    return players[:limit] if limit is not None else players
+
+
+def resolve_riot_ids(players, region, threads=8):
+    """Fills in gameName/tagLine of the players that do not have them yet (account-v1 by PUUID)."""
+    from account_api import get_account_by_puuid
+    account_region = "asia" if region == "sea" else region
+
+    def lookup(player):
+        try:
+            account = get_account_by_puuid(API_KEY, account_region, player["puuid"])
+            player["gameName"], player["tagLine"] = account["gameName"], account["tagLine"]
+        except Exception as e:
+            print(f"Riot ID lookup failed for {player['puuid']}: {e}")
+            player["gameName"] = None
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lookup, [p for p in players if "gameName" not in p]))
+
+
+# --- Checkpoint ---
+
+def load_checkpoint(path, platform, segment):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise SystemExit(f"{path} was written by another version of the runner; delete it to start over")
+    if (checkpoint["platform"], checkpoint["segment"]) != (platform, segment):
+        raise SystemExit(f"{path} is a checkpoint of {checkpoint['platform']} {checkpoint['segment']}, not {platform} {segment}")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    # Written to a temporary file first, so an interruption never leaves a truncated checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+# --- Reporting ---
+
+class Throughput:
+    """Players finished and Riot calls made, carried over from earlier (resumed) runs."""
+
+    def __init__(self, checkpoint):
+        self.players = checkpoint["stats"]["players"]
+        self.calls = checkpoint["stats"]["calls"]
+        self.saved = checkpoint["stats"].get("saved", 0)
+        self.elapsed_before = checkpoint["stats"]["elapsed"]
+        self.outcomes = dict(checkpoint["stats"]["outcomes"])
+        self.started = time.time()
+
+    def elapsed(self):
+        return self.elapsed_before + time.time() - self.started
+
+    def record(self, outcome, calls, saved=0):
+        self.calls += calls
+        self.saved += saved
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def to_stats(self):
+        return {
+            "players": self.players, "calls": self.calls, "saved": self.saved, "elapsed": self.elapsed(),
+            "outcomes": self.outcomes,
+        }
+
+    def report(self, total):
+        minutes = self.elapsed() / 60
+        per_minute = self.players / minutes if minutes else 0.0
+        per_player = self.calls / self.players if self.players else 0.0
+        print(
+            f"{self.players}/{total} players in {minutes:.1f} min: {per_minute:.1f} players/min, "
+            f"{per_player:.1f} Riot calls/player ({self.calls} calls), {self.saved} match downloads saved "
+            f"{json.dumps(self.outcomes)}"
+        )
+
+
+# --- Runner ---
+
+def run(platform, segment, features, limit=None, region=None, checkpoint_path=None, yes_workers=4, saw_workers=2):
+    workers = {"YES": yes_workers, "SAW": saw_workers}
+    features = [f for f in features if workers[f] > 0]
+    processes = 1 + sum(workers[f] for f in features)
+    total_share = float(os.getenv("RIOT_RATE_LIMIT_SHARE", "1"))
+    share = total_share / processes
+
+    # The crawler (this process) imports the SAW copies of league_api/account_api and the limiter
+    os.environ["RIOT_RATE_LIMIT_SHARE"] = str(share)
+    sys.path.insert(0, FEATURE_DIRS["SAW"])
+    from riot_client import client
+    # The player's region, as find_valid_platform sees it (oc1 players are americas, though their
+    # matches route via sea), so the platform remembered by warm() is accepted for the region
+    from strengths_weaknesses import REGION_TO_PLATFORMS
+    region = region or next(r for r, platforms in REGION_TO_PLATFORMS.items() if platform in platforms)
+
+    checkpoint_path = checkpoint_path or f"ladder-{platform}-{segment.replace(':', '')}.json".lower()
+    checkpoint = load_checkpoint(checkpoint_path, platform, segment)
+    if checkpoint is None:
+        players = crawl_segment(platform, segment, limit)
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "platform": platform,
+            "segment": segment,
+            "players": players,
+            "done": {},
+            "stats": {"players": 0, "calls": client.requests_sent, "saved": 0, "elapsed": 0.0, "outcomes": {}},
+        }
+        print(f"Crawled {len(players)} players of {platform} {segment}")
+    else:
+        print(f"Resuming from {checkpoint_path}: {checkpoint['stats']['players']} of {len(checkpoint['players'])} players done")
+    players = checkpoint["players"]
+    throughput = Throughput(checkpoint)
+
+    before = client.requests_sent
+    resolve_riot_ids(players, region)
+    throughput.calls += client.requests_sent - before
+    save_checkpoint(checkpoint_path, checkpoint)
+
+    # Every (player, feature) not done yet; players whose Riot ID could not be resolved count as done
+    pending = {}
+    for player in players:
+        done = checkpoint["done"].setdefault(player["puuid"], {})
+        if player.get("gameName") is None and any(f not in done for f in features):
+            for feature in features:
+                if feature not in done:
+                    done[feature] = FAILED
+                    throughput.record(FAILED, 0)
+            throughput.players += 1
+        pending[player["puuid"]] = [f for f in features if f not in done]
+    total = len(players)
+
+    tracked = [player["puuid"] for player in players]
+    context = multiprocessing.get_context("spawn")  # fresh interpreters: no modules of the other Lambda
+    pools = {
+        feature: ProcessPoolExecutor(
+            max_workers=workers[feature], mp_context=context, initializer=_init_worker,
+            initargs=(FEATURE_DIRS[feature], share, tracked if feature == "SAW" else None)
+        )
+        for feature in features
+    }
+    print(f"{processes} processes share {total_share:g} of the rate limit ({share:.3f} each); region {region}")
+
+    futures = {}
+    for player in players:
+        for feature in pending[player["puuid"]]:
+            future = pools[feature].submit(
+                warm, feature, player["puuid"], player["gameName"], player["tagLine"], region, platform
+            )
+            futures[future] = (player["puuid"], feature)
+
+    last_report = time.time()
+    try:
+        for future in as_completed(futures):
+            puuid, feature = futures[future]
+            outcome, calls, saved, error = future.result()
+            if error:
+                print(f"{feature} failed for {puuid}: {error}")
+            throughput.record(outcome, calls, saved)
+            pending[puuid].remove(feature)
+            checkpoint["done"][puuid][feature] = outcome
+            if not pending[puuid]:
+                throughput.players += 1
+            checkpoint["stats"] = throughput.to_stats()
+            save_checkpoint(checkpoint_path, checkpoint)
+            if time.time() - last_report >= REPORT_INTERVAL:
+                last_report = time.time()
+                throughput.report(total)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume")
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        checkpoint["stats"] = throughput.to_stats()
+        save_checkpoint(checkpoint_path, checkpoint)
+        throughput.report(total)
+    return checkpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precomputes YES and SAW results for a ranked ladder segment")
+    parser.add_argument("platform", help="platform routing value, e.g. sg2, euw1, kr")
+    parser.add_argument("segment", help="challenger, grandmaster, master, or TIER:DIVISION (e.g. DIAMOND:I)")
+    parser.add_argument("--limit", type=int, help="only the best N players of the segment")
+    parser.add_argument("--region", help="region of the cache keys (default: the region the platform is listed under)")
+    parser.add_argument("--features", default="YES,SAW", help="comma-separated: YES, SAW")
+    parser.add_argument("--yes-workers", type=int, default=4, help="processes computing year-end summaries")
+    parser.add_argument("--saw-workers", type=int, default=2, help="processes computing SAW analyses")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: ladder-<platform>-<segment>.json)")
+    args = parser.parse_args()
+
+    features = [f.strip().upper() for f in args.features.split(",") if f.strip()]
+    unknown = set(features) - set(FEATURE_DIRS)
+    if unknown:
+        parser.error(f"unknown features: {', '.join(sorted(unknown))}")
+    run(
+        args.platform.lower(), args.segment, features, limit=args.limit, region=args.region,
+        checkpoint_path=args.checkpoint, yes_workers=args.yes_workers, saw_workers=args.saw_workers,
+    )
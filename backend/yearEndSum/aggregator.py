@@ -0,0 +1,458 @@
+import time
+from collections import defaultdict
+from calendar_window import CalendarWindow, OUTSIDE, resolve_window
+
+# --- Position normalization map ---
+POSITION_ALIASES = {
+    "TOP": "Top",
+    "JUNGLE": "Jungle",
+    "MIDDLE": "Middle",
+    "MID": "Middle",
+    "BOTTOM": "Bottom",
+    "BOT": "Bottom",
+    "SUPPORT": "Support",
+    "UTILITY": "Support",
+}
+
+# The default season, used for states written before windows were recorded
+DEFAULT_WINDOW = resolve_window()[1]
+
+# Fixed section order, so results do not depend on the order matches were consumed in
+ROLE_ORDER = ["Top", "Jungle", "Middle", "Bottom", "Support"]
+
+TOP_CHAMPION_COUNT = 5
+
+# Persisted state keeps at most this many duo partners (the most frequent ones), which keeps
+# the DynamoDB item well under its size limit without affecting the best duo in practice
+DUO_STATE_LIMIT = 1000
+
+STATE_VERSION = 1
+
+
+def normalize_position(raw_position):
+    return POSITION_ALIASES.get((raw_position or "").upper(), "Unknown")
+
+
+def _new_champion_stats():
+    return {
+        'games': 0,
+        'wins': 0,
+        'losses': 0,
+        'kills': 0,
+        'deaths': 0,
+        'assists': 0
+    }
+
+
+def _new_month_stats():
+    return {
+        'wins': 0,
+        'losses': 0,
+        'kills': 0,
+        'deaths': 0,
+        'assists': 0
+    }
+
+
+class SectionAggregator:
+    """
+    One match-derived section of the year-end summary, fed from the shared match stream.
+
+    Plug-ins implement:
+        init()                            empty tallies (called by the constructor)
+        consume(match, participant_index) fold in the tracked player's row of one match
+        merge(other)                      add the tallies of another instance of the same section
+        finalize()                        the section's value for the summary
+        to_state(state) / load_state(state)
+                                          write/read the section's part of the persisted state
+
+    SummaryAggregator does the per-match bookkeeping (which participant is tracked, matches
+    already counted), so plug-ins only see matches they should count. self.window is the
+    CalendarWindow the summary covers.
+    """
+
+    name = None
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.init()
+
+    def init(self):
+        raise NotImplementedError
+
+    def consume(self, m, participant_index):
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def finalize(self):
+        raise NotImplementedError
+
+    def to_state(self, state):
+        raise NotImplementedError
+
+    def load_state(self, state):
+        raise NotImplementedError
+
+
+class YearStatsSection(SectionAggregator):
+    name = 'yearStats'
+    FIELDS = ('gamesPlayed', 'wins', 'losses', 'hoursPlayed', 'kills', 'deaths', 'assists',
+              'pentakills', 'quadrakills', 'triplekills')
+
+    def init(self):
+        self.stats = dict.fromkeys(self.FIELDS, 0)
+
+    def consume(self, m, participant_index):
+        info = m['info']
+        p = info['participants'][participant_index]
+        won = p.get('win', False)
+        stats = self.stats
+        stats['gamesPlayed'] += 1
+        stats['hoursPlayed'] += info.get('gameDuration', 0) / 3600
+        stats['kills'] += p.get('kills', 0)
+        stats['deaths'] += p.get('deaths', 0)
+        stats['assists'] += p.get('assists', 0)
+        stats['wins'] += 1 if won else 0
+        stats['losses'] += 0 if won else 1
+        stats['pentakills'] += p.get('pentaKills', 0)
+        stats['quadrakills'] += p.get('quadraKills', 0)
+        stats['triplekills'] += p.get('tripleKills', 0)
+
+    def merge(self, other):
+        for key in self.FIELDS:
+            self.stats[key] += other.stats[key]
+
+    def finalize(self):
+        stats = self.stats
+        return {
+            'gamesPlayed': stats['gamesPlayed'],
+            'wins': stats['wins'],
+            'losses': stats['losses'],
+            'hoursPlayed': round(stats['hoursPlayed'], 1),
+            'totalKills': stats['kills'],
+            'totalDeaths': stats['deaths'],
+            'totalAssists': stats['assists'],
+            'pentakills': stats['pentakills'],
+            'quadrakills': stats['quadrakills'],
+            'triplekills': stats['triplekills'],
+        }
+
+    def to_state(self, state):
+        state.setdefault('stats', {}).update(self.stats)
+
+    def load_state(self, state):
+        for key, value in state['stats'].items():
+            if key not in ('roles', 'champions'):
+                self.stats[key] = value
+
+
+class MonthlyProgressSection(SectionAggregator):
+    name = 'monthlyProgress'
+
+    def init(self):
+        self.monthly_data = defaultdict(_new_month_stats)
+
+    def consume(self, m, participant_index):
+        info = m['info']
+        p = info['participants'][participant_index]
+        mdata = self.monthly_data[self.window.bucket(info.get('gameCreation', 0) // 1000)]
+        if p.get('win', False):
+            mdata['wins'] += 1
+        else:
+            mdata['losses'] += 1
+        mdata['kills'] += p.get('kills', 0)
+        mdata['deaths'] += p.get('deaths', 0)
+        mdata['assists'] += p.get('assists', 0)
+
+    def merge(self, other):
+        for month, data in other.monthly_data.items():
+            mdata = self.monthly_data[month]
+            for key, value in data.items():
+                mdata[key] += value
+
+    def finalize(self):
+        progress = []
+        for key, data in sorted(self.monthly_data.items(), key=lambda item: self.window.order(item[0])):
+            total_games = data['wins'] + data['losses']
+            kda = round((data['kills'] + data['assists']) / max(1, data['deaths']), 2) if total_games else 0
+            progress.append({
+                'month': self.window.label(key),
+                'key': key,
+                'wins': data['wins'],
+                'losses': data['losses'],
+                'kda': kda
+            })
+        return progress
+
+    def to_state(self, state):
+        state['monthlyData'] = {month: dict(data) for month, data in self.monthly_data.items()}
+
+    def load_state(self, state):
+        for key, mdata in state['monthlyData'].items():
+            if key != OUTSIDE and self.window.order(key) == len(self.window.keys):
+                key = self.window.key_for_label(key)  # bare month name from an older state
+            month = self.monthly_data[key]
+            for field, value in mdata.items():
+                month[field] += value
+
+
+class TopChampionsSection(SectionAggregator):
+    """Per-champion tallies; finalize() returns [(name, stats, most played role)] for the most played."""
+
+    name = 'topChampions'
+
+    def init(self):
+        self.champions = defaultdict(_new_champion_stats)
+        self.champion_roles = defaultdict(lambda: defaultdict(int))
+
+    def consume(self, m, participant_index):
+        p = m['info']['participants'][participant_index]
+        champ = p.get('championName', 'Unknown')
+        cstats = self.champions[champ]
+        cstats['games'] += 1
+        if p.get('win', False):
+            cstats['wins'] += 1
+        else:
+            cstats['losses'] += 1
+        cstats['kills'] += p.get('kills', 0)
+        cstats['deaths'] += p.get('deaths', 0)
+        cstats['assists'] += p.get('assists', 0)
+        role = normalize_position(p.get('individualPosition'))
+        if role != "Unknown":
+            self.champion_roles[champ][role] += 1
+
+    def merge(self, other):
+        for champ, cstats in other.champions.items():
+            mine = self.champions[champ]
+            for key, value in cstats.items():
+                mine[key] += value
+        for champ, roles in other.champion_roles.items():
+            for role, count in roles.items():
+                self.champion_roles[champ][role] += count
+
+    def finalize(self, count=TOP_CHAMPION_COUNT):
+        top_champs = sorted(
+            self.champions.items(),
+            key=lambda x: (-x[1]['games'], x[0])
+        )[:count]
+        result = []
+        for name, data in top_champs:
+            role_counts = self.champion_roles.get(name)
+            role = max(ROLE_ORDER, key=lambda r: (role_counts.get(r, 0), -ROLE_ORDER.index(r))) if role_counts else "Unknown"
+            result.append((name, dict(data), role))
+        return result
+
+    def to_state(self, state):
+        state.setdefault('stats', {})['champions'] = {champ: dict(c) for champ, c in self.champions.items()}
+        state['championRoles'] = {champ: dict(roles) for champ, roles in self.champion_roles.items()}
+
+    def load_state(self, state):
+        for champ, cstats in state['stats']['champions'].items():
+            self.champions[champ].update(cstats)
+        for champ, roles in state['championRoles'].items():
+            self.champion_roles[champ].update(roles)
+
+
+class RoleDistributionSection(SectionAggregator):
+    name = 'roleDistribution'
+
+    def init(self):
+        self.roles = defaultdict(int)
+
+    def consume(self, m, participant_index):
+        self.roles[normalize_position(m['info']['participants'][participant_index].get('individualPosition'))] += 1
+
+    def merge(self, other):
+        for role, count in other.roles.items():
+            self.roles[role] += count
+
+    def finalize(self):
+        roles = self.roles
+        total_roles = sum(roles.values()) or 1
+        return [
+            {'role': r, 'value': round(roles[r] / total_roles * 100, 1)}
+            for r in ROLE_ORDER if r in roles
+        ]
+
+    def to_state(self, state):
+        state.setdefault('stats', {})['roles'] = dict(self.roles)
+
+    def load_state(self, state):
+        self.roles.update(state['stats']['roles'])
+
+
+class BestDuoSection(SectionAggregator):
+    name = 'bestDuo'
+
+    def init(self):
+        self.duo_counts = defaultdict(int)
+        self.duo_profiles = {}
+
+    def consume(self, m, participant_index):
+        metadata, info = m['metadata'], m['info']
+        puuid = metadata['participants'][participant_index]
+        team_start = (participant_index // 5) * 5
+        team_end = min(team_start + 5, len(metadata['participants']))
+        for teammate_idx in range(team_start, team_end):
+            if teammate_idx == participant_index or teammate_idx >= len(info['participants']):
+                continue
+            teammate_puuid = metadata['participants'][teammate_idx]
+            if teammate_puuid == puuid:
+                continue
+            self.duo_counts[teammate_puuid] += 1
+            teammate_info = info['participants'][teammate_idx]
+            self.duo_profiles.setdefault(teammate_puuid, {
+                'name': teammate_info.get('riotIdGameName') or teammate_info.get('summonerName') or "Unknown",
+                'tagline': teammate_info.get('riotIdTagline'),
+            })
+
+    def merge(self, other):
+        for teammate, count in other.duo_counts.items():
+            self.duo_counts[teammate] += count
+        for teammate, profile in other.duo_profiles.items():
+            self.duo_profiles.setdefault(teammate, profile)
+
+    def finalize(self):
+        if not self.duo_counts:
+            return None
+        best_puuid, games_together = min(self.duo_counts.items(), key=lambda item: (-item[1], item[0]))
+        profile = self.duo_profiles.get(best_puuid, {})
+        return {
+            'puuid': best_puuid,
+            'name': profile.get('name'),
+            'tagline': profile.get('tagline'),
+            'gamesTogether': games_together,
+        }
+
+    def to_state(self, state):
+        duo_counts = self.duo_counts
+        if len(duo_counts) > DUO_STATE_LIMIT:
+            duo_counts = dict(sorted(duo_counts.items(), key=lambda item: (-item[1], item[0]))[:DUO_STATE_LIMIT])
+        state['duoCounts'] = dict(duo_counts)
+        state['duoProfiles'] = {puuid: self.duo_profiles[puuid] for puuid in duo_counts if puuid in self.duo_profiles}
+
+    def load_state(self, state):
+        self.duo_counts.update(state['duoCounts'])
+        self.duo_profiles.update(state['duoProfiles'])
+
+
+# Every match-derived section, in the order they appear in the summary
+SECTIONS = (YearStatsSection, MonthlyProgressSection, TopChampionsSection, RoleDistributionSection, BestDuoSection)
+SECTION_NAMES = tuple(section.name for section in SECTIONS)
+
+
+class SummaryAggregator:
+    """
+    Streaming aggregator for the match-derived sections of the year-end summary.
+
+    Every match payload is passed to consume() exactly once, in any order; the tracked
+    player's participant index is looked up once and each enabled section plug-in folds
+    the match in, so a summary costs one match-detail call per match however many
+    sections it has. finalize() returns {section name: value}.
+
+    sections selects the plug-ins to run (all of SECTION_NAMES by default). Aggregators of
+    the same player can be combined with merge(), e.g. after splitting a history across
+    workers, and timings holds the seconds each section has spent in consume/finalize.
+    """
+
+    def __init__(self, puuid, sections=None, window=DEFAULT_WINDOW):
+        sections = SECTION_NAMES if sections is None else tuple(sections)
+        unknown = [name for name in sections if name not in SECTION_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown summary sections: {', '.join(unknown)}")
+        self.puuid = puuid
+        self.window = window
+        self.sections = {cls.name: cls(window) for cls in SECTIONS if cls.name in sections}
+        self.timings = dict.fromkeys(self.sections, 0.0)
+        self.games = 0
+        # Newest match folded in so far, and the watermark this run resumed from
+        self.newest_match_id = None
+        self.newest_game_creation = 0
+        self.watermark = 0
+
+    def consume(self, m):
+        metadata, info = m['metadata'], m['info']
+        if self.puuid not in metadata['participants']:
+            return False
+        game_creation = info.get('gameCreation', 0)
+        if game_creation and game_creation <= self.watermark:
+            return False  # already counted in the state this run resumed from
+        if game_creation > self.newest_game_creation:
+            self.newest_game_creation = game_creation
+            self.newest_match_id = metadata.get('matchId')
+
+        idx = metadata['participants'].index(self.puuid)
+        self.games += 1
+        for name, section in self.sections.items():
+            started = time.perf_counter()
+            section.consume(m, idx)
+            self.timings[name] += time.perf_counter() - started
+        return True
+
+    def merge(self, other):
+        """
+        Adds another aggregator's tallies for the same player and sections (matches must not overlap).
+        Its window must lie inside this one, e.g. one month of a season.
+        """
+        if other.puuid != self.puuid or other.sections.keys() != self.sections.keys() or not self.window.covers(other.window):
+            raise ValueError("Only aggregators of the same player and sections, within this window, can be merged")
+        for name, section in self.sections.items():
+            section.merge(other.sections[name])
+        self.games += other.games
+        if other.newest_game_creation > self.newest_game_creation:
+            self.newest_game_creation = other.newest_game_creation
+            self.newest_match_id = other.newest_match_id
+        return self
+
+    def finalize(self):
+        result = {}
+        for name, section in self.sections.items():
+            started = time.perf_counter()
+            result[name] = section.finalize()
+            self.timings[name] += time.perf_counter() - started
+        return result
+
+    # === Persisted state (for incremental refreshes) ===
+    def to_state(self):
+        """Returns a JSON-serializable snapshot of every running tally."""
+        state = {
+            'version': STATE_VERSION,
+            'puuid': self.puuid,
+            'sections': list(self.sections),
+            'window': [self.window.start, self.window.end, self.window.timezone],
+            'games': self.games,
+        }
+        for section in self.sections.values():
+            section.to_state(state)
+        state['newestMatchId'] = self.newest_match_id
+        state['newestGameCreation'] = self.newest_game_creation
+        return state
+
+    @classmethod
+    def from_state(cls, state, sections=None):
+        """
+        Rebuilds an aggregator from to_state() output; later consume() calls only fold in newer matches.
+
+        States written before sections could be selected hold every section, and those written
+        before windows were recorded cover DEFAULT_WINDOW. sections, if given, picks a subset of
+        the ones the state holds.
+        """
+        if state.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported aggregate state version: {state.get('version')}")
+        available = state.get('sections', SECTION_NAMES)
+        if sections is not None:
+            missing = [name for name in sections if name not in available]
+            if missing:
+                raise ValueError(f"Aggregate state has no {', '.join(missing)} section")
+            available = sections
+        window = CalendarWindow(*state['window']) if 'window' in state else DEFAULT_WINDOW
+        agg = cls(state['puuid'], available, window)
+        for section in agg.sections.values():
+            section.load_state(state)
+        agg.games = state.get('games', state.get('stats', {}).get('gamesPlayed', 0))
+        agg.newest_match_id = state.get('newestMatchId')
+        agg.newest_game_creation = state.get('newestGameCreation', 0)
+        agg.watermark = agg.newest_game_creation
+        return agg
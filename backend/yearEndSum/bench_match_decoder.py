@@ -0,0 +1,121 @@
+# bench_match_decoder.py
+# Compares match_decoder against response.json() on MATCH-V5 responses: per-match decode time,
+# peak memory while decoding (tracemalloc) and the size of what stays alive afterwards.
+#
+#     python bench_match_decoder.py                    # a synthetic ranked match (~140 fields per participant)
+#     python bench_match_decoder.py SG2_123.json ...   # raw responses saved from Riot
+#
+# The target player is the first participant. response.json() is json.loads on the decoded text.
+
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+import match_decoder
+
+PARTICIPANT_FIELDS = (
+    "allInPings assistMePings assists baronKills basicPings bountyLevel champExperience champLevel championId "
+    "championName championTransform commandPings consumablesPurchased damageDealtToBuildings "
+    "damageDealtToObjectives damageDealtToTurrets damageSelfMitigated dangerPings deaths detectorWardsPlaced "
+    "doubleKills dragonKills eligibleForProgression enemyMissingPings enemyVisionPings firstBloodAssist "
+    "firstBloodKill firstTowerAssist firstTowerKill gameEndedInEarlySurrender gameEndedInSurrender getBackPings "
+    "goldEarned goldSpent holdPings individualPosition inhibitorKills inhibitorTakedowns inhibitorsLost item0 "
+    "item1 item2 item3 item4 item5 item6 itemsPurchased killingSprees kills lane largestCriticalStrike "
+    "largestKillingSpree largestMultiKill longestTimeSpentLiving magicDamageDealt magicDamageDealtToChampions "
+    "magicDamageTaken needVisionPings neutralMinionsKilled nexusKills nexusLost nexusTakedowns objectivesStolen "
+    "objectivesStolenAssists onMyWayPings participantId pentaKills physicalDamageDealt "
+    "physicalDamageDealtToChampions physicalDamageTaken placement playerAugment1 playerAugment2 playerAugment3 "
+    "playerAugment4 playerSubteamId profileIcon pushPings puuid quadraKills riotIdGameName riotIdTagline role "
+    "sightWardsBoughtInGame spell1Casts spell2Casts spell3Casts spell4Casts subteamPlacement summoner1Casts "
+    "summoner1Id summoner2Casts summoner2Id summonerId summonerLevel summonerName teamEarlySurrendered teamId "
+    "teamPosition timeCCingOthers timePlayed totalAllyJungleMinionsKilled totalDamageDealt "
+    "totalDamageDealtToChampions totalDamageShieldedOnTeammates totalDamageTaken totalEnemyJungleMinionsKilled "
+    "totalHeal totalHealsOnTeammates totalMinionsKilled totalTimeCCDealt totalTimeSpentDead totalUnitsHealed "
+    "tripleKills trueDamageDealt trueDamageDealtToChampions trueDamageTaken turretKills turretTakedowns "
+    "turretsLost unrealKills visionClearedPings visionScore visionWardsBoughtInGame wardsKilled wardsPlaced win"
+).split()
+STRING_FIELDS = {"championName", "individualPosition", "lane", "role", "teamPosition", "riotIdGameName",
+                 "riotIdTagline", "summonerName", "summonerId", "puuid"}
+BOOL_FIELDS = {"win", "firstBloodKill", "firstBloodAssist", "firstTowerKill", "firstTowerAssist",
+               "gameEndedInSurrender", "gameEndedInEarlySurrender", "teamEarlySurrendered", "eligibleForProgression"}
+CHALLENGE_COUNT = 125
+
+
+def synthetic_match():
+    puuids = [f"{i:02d}" + "x" * 76 for i in range(10)]
+    participants = []
+    for i, puuid in enumerate(puuids):
+        p = {}
+        for j, field in enumerate(PARTICIPANT_FIELDS):
+            if field in STRING_FIELDS:
+                p[field] = f"{field}-{i}"
+            elif field in BOOL_FIELDS:
+                p[field] = i < 5
+            else:
+                p[field] = (i + 1) * (j + 7) * 13
+        p.update(puuid=puuid, participantId=i + 1, teamId=100 if i < 5 else 200)
+        p["challenges"] = {f"challenge{k:03d}": (i + 1) * k / 7 for k in range(CHALLENGE_COUNT)}
+        p["missions"] = {f"playerScore{k}": 0 for k in range(12)}
+        p["perks"] = {
+            "statPerks": {"defense": 5001, "flex": 5008, "offense": 5005},
+            "styles": [{"description": "primaryStyle", "selections": [
+                {"perk": 8000 + k, "var1": k, "var2": 0, "var3": 0} for k in range(4)], "style": 8000},
+                {"description": "subStyle", "selections": [
+                    {"perk": 8100 + k, "var1": k, "var2": 0, "var3": 0} for k in range(2)], "style": 8100}],
+        }
+        participants.append(p)
+    teams = [{"teamId": team, "win": team == 100,
+              "bans": [{"championId": k, "pickTurn": k} for k in range(5)],
+              "objectives": {o: {"first": team == 100, "kills": 3} for o in
+                             ("baron", "champion", "dragon", "horde", "inhibitor", "riftHerald", "tower")}}
+             for team in (100, 200)]
+    return {
+        "metadata": {"dataVersion": "2", "matchId": "SG2_1234567890", "participants": puuids},
+        "info": {
+            "endOfGameResult": "GameComplete", "gameCreation": 1750000000000, "gameDuration": 1800,
+            "gameEndTimestamp": 1750001900000, "gameId": 1234567890, "gameMode": "CLASSIC",
+            "gameName": "teambuilder-match-1234567890", "gameStartTimestamp": 1750000100000,
+            "gameType": "MATCHED_GAME", "gameVersion": "15.12.690.1234", "mapId": 11, "participants": participants,
+            "platformId": "SG2", "queueId": 420, "teams": teams, "tournamentCode": "",
+        },
+    }
+
+
+def peak_bytes(fn):
+    """Peak traced allocation while fn runs, and the size still held by its result."""
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, retained
+
+
+def best_of(fn, number=200, repeat=5):
+    """Best per-call time in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench(name, raw):
+    puuid = json.loads(raw)["metadata"]["participants"][0]
+    decoders = [("response.json()", lambda: json.loads(raw.decode("utf-8")))]
+    decoders.append(("match_decoder (hook)", lambda: match_decoder.decode(raw, {puuid}, "hook")))
+    if match_decoder.orjson is not None:
+        decoders.append(("orjson.loads", lambda: match_decoder.orjson.loads(raw)))
+        decoders.append(("match_decoder (orjson)", lambda: match_decoder.decode(raw, {puuid}, "orjson")))
+
+    print(f"\n{name}: {len(raw)} bytes")
+    print(f"{'decoder':<26}{'decode us':>12}{'peak KiB':>12}{'kept KiB':>12}")
+    for label, fn in decoders:
+        peak, retained = peak_bytes(fn)
+        print(f"{label:<26}{best_of(fn):>12.1f}{peak / 1024:>12.1f}{retained / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                bench(os.path.basename(path), f.read())
+    else:
+        bench("synthetic ranked match", json.dumps(synthetic_match()).encode("utf-8"))
@@ -0,0 +1,87 @@
+# bench_result_codec.py
+# Compares stored item size and encode/decode time of result_codec against the formats it
+# replaced: the JSON string the YES handler stored and the Decimal map the SAW/COMP handlers
+# stored.
+#
+#     python bench_result_codec.py                      # test.json
+#     python bench_result_codec.py yes.json saw.json    # results saved from real runs
+#
+# Sizes follow DynamoDB's item-size rules (strings/binary by length, numbers by significant
+# digits, +3 bytes per map/list and +1 per element), which is what read/write capacity bills.
+
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+import result_codec
+from fixtures import load_payload
+
+
+def to_decimal(obj):
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: to_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_decimal(v) for v in obj]
+    return obj
+
+
+def from_decimal(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, dict):
+        return {k: from_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [from_decimal(v) for v in obj]
+    return obj
+
+
+def dynamodb_size(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        digits = len(str(abs(value)).replace(".", "").lstrip("0")) or 1
+        return (digits + 1) // 2 + 1
+    if isinstance(value, dict):
+        return 3 + sum(1 + len(k.encode("utf-8")) + dynamodb_size(v) for k, v in value.items())
+    if isinstance(value, list):
+        return 3 + sum(1 + dynamodb_size(v) for v in value)
+    raise TypeError(f"Unsupported type {type(value)}")
+
+
+def best_of(fn, number=200, repeat=5):
+    """Best per-call time in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench(name, payload):
+    text = json.dumps(payload)
+    decimal_map = to_decimal(payload)
+    blob = result_codec.encode(payload)
+    assert result_codec.decode(blob) == json.loads(text)
+
+    rows = [
+        ("JSON string (old YES)", dynamodb_size(text),
+         best_of(lambda: json.dumps(payload)), best_of(lambda: json.loads(text))),
+        ("Decimal map (old SAW/COMP)", dynamodb_size(decimal_map),
+         best_of(lambda: to_decimal(payload)), best_of(lambda: from_decimal(decimal_map))),
+        (f"result_codec v{result_codec.VERSION}", dynamodb_size(blob),
+         best_of(lambda: result_codec.encode(payload)), best_of(lambda: result_codec.decode(blob))),
+    ]
+
+    print(f"\n{name}")
+    print(f"{'format':<28}{'item bytes':>12}{'encode us':>12}{'decode us':>12}")
+    for label, size, encode_us, decode_us in rows:
+        print(f"{label:<28}{size:>12}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.json")]
+    for path in paths:
+        bench(os.path.basename(path), load_payload(path))
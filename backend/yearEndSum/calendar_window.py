@@ -0,0 +1,203 @@
+# calendar_window.py
+# Calendar-month buckets for a time window, in a given IANA timezone.
+#
+# A window [start, end) (epoch seconds) is split at local midnight on the 1st of every month,
+# so month boundaries follow the timezone's daylight-saving changes instead of a hand-written
+# epoch table. Buckets are keyed "YYYY-MM", which keeps two Novembers of one season apart,
+# and carry a display label ("Nov"). A game is bucketed with bisect on the precomputed bucket
+# starts; bucket_array() does the same for a whole timestamp column with numpy.searchsorted.
+#
+# SUMMARY_TIMEZONE sets the default timezone (Australia/Sydney, the AEDT/AEST months the
+# summary has always used).
+#
+# resolve_window() turns a request's window spec (a season, a ranked split, the last N days or
+# a custom range) into a CalendarWindow plus the id that names it in cache sort keys.
+
+import os
+import re
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_TIMEZONE = os.getenv("SUMMARY_TIMEZONE", "Australia/Sydney")
+
+# Key of games outside the window
+OUTSIDE = "Unknown"
+
+# Seasons run from local midnight on Nov 1 of the previous year (the 2025 season: Nov 2024 - Nov 2025)
+SEASON_START_MONTH = 11
+DEFAULT_SEASON = 2025
+
+# Ranked split start dates (local), per season; a split ends where the next one, or the season, does
+SPLIT_STARTS = {
+    2025: ("2025-01-09", "2025-04-30", "2025-08-27"),
+}
+
+MAX_LAST_DAYS = 366
+
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+class CalendarWindow:
+    """Month buckets covering [start, end) epoch seconds in `timezone`."""
+
+    def __init__(self, start, end, timezone=DEFAULT_TIMEZONE):
+        if end <= start:
+            raise ValueError(f"Empty calendar window: {start} >= {end}")
+        self.start = int(start)
+        self.end = int(end)
+        self.timezone = timezone
+        tz = ZoneInfo(timezone)
+
+        # The first bucket starts at the window start (which may be mid-month), the others at
+        # local midnight on the 1st
+        local = datetime.fromtimestamp(self.start, tz)
+        self.starts = [self.start]
+        self.keys = [f"{local.year:04d}-{local.month:02d}"]
+        year, month = local.year, local.month
+        while True:
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            boundary = int(datetime(year, month, 1, tzinfo=tz).timestamp())
+            if boundary >= self.end:
+                break
+            self.starts.append(boundary)
+            self.keys.append(f"{year:04d}-{month:02d}")
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    def __repr__(self):
+        return f"CalendarWindow({self.start}, {self.end}, {self.timezone!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, CalendarWindow) and (self.start, self.end, self.timezone) == (
+            other.start, other.end, other.timezone
+        )
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.timezone))
+
+    def covers(self, other):
+        """True when `other` lies inside this window, in the same timezone."""
+        return self.timezone == other.timezone and self.start <= other.start and other.end <= self.end
+
+    def segments(self):
+        """[(key, start, end)] for every bucket, the first and last possibly partial months."""
+        ends = self.starts[1:] + [self.end]
+        return list(zip(self.keys, self.starts, ends))
+
+    def bucket(self, timestamp):
+        """Key of the month containing `timestamp` (epoch seconds), or OUTSIDE."""
+        if not self.start <= timestamp < self.end:
+            return OUTSIDE
+        return self.keys[bisect_right(self.starts, timestamp) - 1]
+
+    def bucket_array(self, timestamps):
+        """Vectorized bucket(): an object array of keys for an array of epoch seconds."""
+        if np is None:
+            return [self.bucket(ts) for ts in timestamps]
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        keys = np.array(self.keys + [OUTSIDE], dtype=object)
+        positions = np.searchsorted(np.array(self.starts, dtype=np.int64), timestamps, side="right") - 1
+        positions[(timestamps < self.start) | (timestamps >= self.end)] = len(self.keys)
+        return keys[positions]
+
+    def order(self, key):
+        """Sort key placing buckets in calendar order, with OUTSIDE (and unknown keys) last."""
+        return self._index.get(key, len(self.keys))
+
+    @staticmethod
+    def label(key):
+        """Display name of a bucket: "2024-11" -> "Nov"."""
+        if key == OUTSIDE:
+            return OUTSIDE
+        return MONTH_NAMES[int(key.split("-")[1]) - 1]
+
+    def key_for_label(self, label):
+        """
+        Maps a bare month name, as stored in aggregate states written before buckets had
+        unique keys, to the first bucket with that name (or OUTSIDE).
+        """
+        for key in self.keys:
+            if self.label(key) == label:
+                return key
+        return OUTSIDE
+
+
+def _local_midnight(day, timezone):
+    return int(datetime(day.year, day.month, day.day, tzinfo=ZoneInfo(timezone)).timestamp())
+
+
+def month_window(key, timezone=DEFAULT_TIMEZONE):
+    """The whole calendar month "YYYY-MM"."""
+    year, month = (int(part) for part in key.split("-"))
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return CalendarWindow(_local_midnight(date(year, month, 1), timezone), _local_midnight(following, timezone), timezone)
+
+
+def season_window(season, timezone=DEFAULT_TIMEZONE):
+    return CalendarWindow(
+        _local_midnight(date(season - 1, SEASON_START_MONTH, 1), timezone),
+        _local_midnight(date(season, SEASON_START_MONTH, 1), timezone),
+        timezone,
+    )
+
+
+def split_window(season, split, timezone=DEFAULT_TIMEZONE):
+    starts = SPLIT_STARTS.get(season)
+    if not starts or not 1 <= split <= len(starts):
+        raise ValueError(f"Unknown split {split} of season {season}")
+    start = _local_midnight(date.fromisoformat(starts[split - 1]), timezone)
+    if split < len(starts):
+        end = _local_midnight(date.fromisoformat(starts[split]), timezone)
+    else:
+        end = season_window(season, timezone).end
+    return CalendarWindow(start, end, timezone)
+
+
+def last_days_window(days, now=None, timezone=DEFAULT_TIMEZONE):
+    """The last `days` local days, today included. It only moves at midnight, so its cache key is stable for a day."""
+    today = datetime.fromtimestamp(time.time() if now is None else now, ZoneInfo(timezone)).date()
+    end = today + timedelta(days=1)
+    return CalendarWindow(_local_midnight(end - timedelta(days=days), timezone), _local_midnight(end, timezone), timezone)
+
+
+def resolve_window(spec=None, now=None, timezone=DEFAULT_TIMEZONE):
+    """
+    Turns a window spec into (window_id, CalendarWindow):
+
+        None or "2025"          a season (DEFAULT_SEASON when None)
+        "2025S2"                a ranked split of a season
+        "last30d"               the last 30 days, today included
+        {"start": s, "end": e}  a custom range in epoch seconds
+
+    The id names the window in cache sort keys (e.g. "2025#YES") and never contains '#'.
+    Raises ValueError for anything else.
+    """
+    if spec is None:
+        spec = str(DEFAULT_SEASON)
+    if isinstance(spec, dict):
+        try:
+            start, end = int(spec["start"]), int(spec["end"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("A custom window needs integer start and end epoch seconds")
+        return f"c{start}-{end}", CalendarWindow(start, end, timezone)
+    if not isinstance(spec, str):
+        raise ValueError(f"Unsupported window: {spec!r}")
+
+    match = re.fullmatch(r"(\d{4})(?:S(\d))?", spec)
+    if match:
+        season = int(match.group(1))
+        if match.group(2):
+            return spec, split_window(season, int(match.group(2)), timezone)
+        return spec, season_window(season, timezone)
+    match = re.fullmatch(r"last(\d+)d", spec)
+    if match and 1 <= int(match.group(1)) <= MAX_LAST_DAYS:
+        window = last_days_window(int(match.group(1)), now, timezone)
+        last_day = datetime.fromtimestamp(window.end - 1, ZoneInfo(timezone)).strftime("%Y%m%d")
+        return f"d{match.group(1)}-{last_day}", window
+    raise ValueError(f"Unsupported window: {spec!r}")
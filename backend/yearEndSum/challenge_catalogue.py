@@ -0,0 +1,99 @@
+# challenge_catalogue.py
+# Static challenge metadata (names/descriptions), loaded once per platform.
+#
+# /lol/challenges/v1/challenges/config returns every challenge config in one call and only
+# changes with patches. The catalogue keeps the trimmed en_US names in warm-container memory
+# and persists a versioned snapshot to the playerUserData table, so a cold start reads one
+# DynamoDB item instead of calling Riot. Snapshots older than CATALOGUE_TTL_SECONDS are
+# refreshed from Riot.
+
+import json
+import os
+import threading
+import time
+import summoner
+
+CATALOGUE_TTL_SECONDS = int(os.getenv("CHALLENGE_CATALOGUE_TTL", str(24 * 60 * 60)))
+
+# Bump when the snapshot layout changes; older snapshots are then ignored
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SORT_KEY = f"v{SNAPSHOT_VERSION}#CHALLENGE_CONFIG"
+
+_lock = threading.Lock()
+_catalogues = {}  # platform -> {"loadedAt": epoch, "challenges": {id: {"name", "description"}}}
+_table = None
+
+
+def _snapshot_table():
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource("dynamodb").Table(os.getenv("DYNAMODB_TABLE", "playerUserData"))
+    return _table
+
+
+def _trim(configs):
+    # Only the en_US name and description are used, which keeps the snapshot small
+    challenges = {}
+    for config in configs:
+        names = config.get("localizedNames", {}).get("en_US", {})
+        challenges[str(config.get("id"))] = {
+            "name": names.get("name", "Unknown Challenge"),
+            "description": names.get("description", ""),
+        }
+    return challenges
+
+
+def _load_snapshot(platform):
+    try:
+        item = _snapshot_table().get_item(
+            Key={"player": f"static#{platform}", "year#feature": SNAPSHOT_SORT_KEY}
+        ).get("Item")
+    except Exception as e:
+        print(f"Challenge catalogue snapshot read failed for {platform}: {e}")
+        return None
+    if not item:
+        return None
+    return {"loadedAt": int(item["timestamp"]), "challenges": json.loads(item["challenges"])}
+
+
+def _save_snapshot(platform, catalogue):
+    try:
+        _snapshot_table().put_item(Item={
+            "player": f"static#{platform}",
+            "year#feature": SNAPSHOT_SORT_KEY,
+            "challenges": json.dumps(catalogue["challenges"]),
+            "timestamp": catalogue["loadedAt"],
+        })
+    except Exception as e:
+        print(f"Challenge catalogue snapshot write failed for {platform}: {e}")
+
+
+def get_catalogue(region):
+    """Returns {challenge id (str): {"name", "description"}} for the region's platform."""
+    platform = summoner.get_platform(region)
+    now = int(time.time())
+    with _lock:
+        catalogue = _catalogues.get(platform)
+        if catalogue and now - catalogue["loadedAt"] < CATALOGUE_TTL_SECONDS:
+            return catalogue["challenges"]
+
+        catalogue = _load_snapshot(platform)
+        if not catalogue or now - catalogue["loadedAt"] >= CATALOGUE_TTL_SECONDS:
+            catalogue = {"loadedAt": now, "challenges": _trim(summoner.get_challenge_configs(region))}
+            _save_snapshot(platform, catalogue)
+        _catalogues[platform] = catalogue
+        return catalogue["challenges"]
+
+
+def describe_challenge(challenge_id, region):
+    """O(1) name/description lookup; falls back to the per-challenge endpoint for brand-new IDs."""
+    entry = get_catalogue(region).get(str(challenge_id))
+    if entry is not None:
+        return entry
+    config = summoner.get_challenge_config_by_id(challenge_id, region)
+    names = config.get("localizedNames", {}).get("en_US", {})
+    return {
+        "name": names.get("name", "Unknown Challenge"),
+        "description": names.get("description", ""),
+    }
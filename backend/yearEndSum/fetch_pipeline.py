@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import match
+from riot_client import MAX_FETCH_WORKERS
+
+# Stop handing out new work once less than this many seconds remain before the deadline
+DEADLINE_MARGIN_SECONDS = 3
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the fetch pipeline stops early because the Lambda deadline is close.
+
+    unfinished lists the match IDs that were handed to the pipeline but not yielded, so a
+    caller can put them back in its cursor. checkpoint is set by callers that saved enough
+    state to resume the work in a later invocation.
+    """
+
+    def __init__(self, completed, unfinished=(), checkpoint=None):
+        super().__init__(f"Deadline reached after fetching {completed} matches")
+        self.completed = completed
+        self.unfinished = list(unfinished)
+        self.checkpoint = checkpoint
+
+
+def deadline_from_context(context):
+    """Converts a Lambda context into an absolute epoch deadline (None outside Lambda)."""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.time() + context.get_remaining_time_in_millis() / 1000
+
+
+def fetch_match_details(match_ids, region="sea", max_workers=None, deadline=None, puuids=None):
+    """
+    Fetches match details with bounded concurrency.
+
+    Yields (match_id, payload) pairs in completion order, not listing order. match_ids
+    may be a lazy iterator (e.g. match.iter_full_year_matches); it is only advanced
+    when a worker slot frees up. When the deadline gets within DEADLINE_MARGIN_SECONDS,
+    queued fetches are cancelled and DeadlineExceeded is raised with the IDs still in flight.
+    With puuids, payloads are slim documents projected for those players (see match_decoder).
+    """
+    max_workers = max_workers or MAX_FETCH_WORKERS
+    ids = iter(match_ids)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    completed = 0
+
+    def time_left():
+        return None if deadline is None else deadline - DEADLINE_MARGIN_SECONDS - time.time()
+
+    def fill():
+        while len(pending) < max_workers * 2:
+            match_id = next(ids, None)
+            if match_id is None:
+                return
+            future = executor.submit(match.get_match_details_by_match_id, match_id, region, puuids=puuids)
+            pending[future] = match_id
+
+    try:
+        fill()
+        while pending:
+            remaining = time_left()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(completed, unfinished=pending.values())
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                match_id = pending.pop(future)
+                completed += 1
+                yield match_id, future.result()
+            fill()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,16 @@
+# fixtures.py
+# Loads saved summary results (test.json, or results saved from real runs) for the local tools:
+# bench_result_codec.py benchmarks them and stream_server.py --replay serves them.
+
+import ast
+import json
+
+
+def load_payload(path):
+    with open(path) as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # hand-written samples such as test.json use Python literal syntax (trailing commas)
+        return ast.literal_eval(text)
@@ -1,15 +1,8 @@
-import time
-import requests
+from riot_client import client
 
-def request_with_retry(url, max_retries=3):
-    for attempt in range(max_retries):
-        response = requests.get(url)
-        if response.status_code == 429:
-            retry_after = int(response.headers.get("Retry-After", 1))
-            print(f"Rate limited. Waiting for {retry_after} seconds...")
-            time.sleep(retry_after)
-            continue
-        return response
-    response.raise_for_status()
+def request_with_retry(url, method, max_retries=3):
+    # method names the Riot endpoint (e.g. "match-v5.getMatch") so it gets its own rate-limit bucket
+    response = client.get(url, method, max_retries=max_retries)
+    if response.status_code == 429:
+        response.raise_for_status()
     return response
-
@@ -0,0 +1,146 @@
+# jobs.py
+# Background jobs for year-end summaries that do not fit in an API Gateway request.
+#
+# The HTTP handler creates a job item in playerUserData and sends it to a queue, then returns
+# 202 straight away. A worker (the same Lambda, triggered by SQS) computes the summary and
+# writes progress, the sections computed so far and the final result back to the job item,
+# which the frontend polls.
+#
+# JOB_QUEUE_URL selects an SQS queue. Without it, LocalJobQueue runs jobs on an in-process
+# thread, which is only meant for local runs and tests (Lambda freezes the container once
+# the response is returned).
+
+import json
+import os
+import threading
+import time
+import uuid
+import result_codec
+
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL")
+JOB_SORT_KEY = "YES#JOB"
+JOB_TTL_SECONDS = 24 * 60 * 60
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class SqsJobQueue:
+    def __init__(self, queue_url):
+        import boto3
+        self.sqs = boto3.client("sqs")
+        self.queue_url = queue_url
+
+    def send(self, job):
+        self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(job))
+
+
+class LocalJobQueue:
+    """In-process stand-in for SQS: each job runs on its own daemon thread."""
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    def send(self, job):
+        threading.Thread(target=self.worker, args=(job, None), daemon=True).start()
+
+
+def get_queue(worker):
+    return SqsJobQueue(JOB_QUEUE_URL) if JOB_QUEUE_URL else LocalJobQueue(worker)
+
+
+def job_key(job_id):
+    return {"player": f"job#{job_id}", "year#feature": JOB_SORT_KEY}
+
+
+def create_job(table, request):
+    """Writes a queued job item and returns the job message to send to the queue."""
+    job_id = uuid.uuid4().hex
+    now = int(time.time())
+    table.put_item(Item={
+        **job_key(job_id),
+        "status": QUEUED,
+        "request": json.dumps(request),
+        "processed": 0,
+        "createdAt": now,
+        "updatedAt": now,
+        "expiresAt": now + JOB_TTL_SECONDS,  # DynamoDB TTL attribute
+    })
+    return {"jobId": job_id, **request}
+
+
+def update_job(table, job_id, status, **fields):
+    names = {"#status": "status"}
+    values = {":status": status, ":updatedAt": int(time.time())}
+    assignments = ["#status = :status", "updatedAt = :updatedAt"]
+    for i, (name, value) in enumerate(fields.items()):
+        names[f"#f{i}"] = name
+        values[f":f{i}"] = value
+        assignments.append(f"#f{i} = :f{i}")
+    table.update_item(
+        Key=job_key(job_id),
+        UpdateExpression="SET " + ", ".join(assignments),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
+
+
+def get_job(table, job_id):
+    return table.get_item(Key=job_key(job_id)).get("Item")
+
+
+def delete_job(table, job_id):
+    table.delete_item(Key=job_key(job_id))
+
+
+class ProgressReporter:
+    """Writes the processed-match count to the job item at most every `interval` seconds."""
+
+    def __init__(self, table, job_id, interval=2.0):
+        self.table = table
+        self.job_id = job_id
+        self.interval = interval
+        self.processed = 0
+        self._last = 0.0
+
+    def __call__(self, processed):
+        self.processed = processed
+        now = time.time()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        try:
+            update_job(self.table, self.job_id, RUNNING, processed=processed)
+        except Exception as e:
+            print(f"Job progress update failed for {self.job_id}: {e}")
+
+
+class PartialResultReporter:
+    """
+    Collects iter_summary sections and writes the partial result to the job item, so pollers can
+    render sections before the whole summary is done. The first value of each section is written
+    straight away; updates to sections already written, at most every `interval` seconds.
+    """
+
+    def __init__(self, table, job_id, interval=2.0):
+        self.table = table
+        self.job_id = job_id
+        self.interval = interval
+        self.partial = {}
+        self._last = 0.0
+
+    def __call__(self, section, data):
+        if section == "progress":
+            return
+        is_new = section not in self.partial
+        self.partial[section] = data
+        now = time.time()
+        if not is_new and now - self._last < self.interval:
+            return
+        self._last = now
+        try:
+            update_job(self.table, self.job_id, RUNNING, partial=result_codec.encode(self.partial))
+        except Exception as e:
+            print(f"Job partial result update failed for {self.job_id}: {e}")
@@ -1,44 +1,271 @@
 import boto3
+import contextlib
 import time
 import json
-from year_end_summary import summary
+from year_end_summary import incremental_summary, OPTIONAL_SECTIONS
+from calendar_window import CalendarWindow, resolve_window
+from fetch_pipeline import DeadlineExceeded, deadline_from_context
+from riot_client import client
+import jobs
+import lease
+import cache_policy
+import result_codec
+import summary_stream
+from riot_id_cache import RiotIdNotFound
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table("playerUserData")
 
+# Summaries are cached per window: "<window id>#YES" (e.g. "2025#YES", "2025S2#YES")
+FEATURE = "YES"
+DEFAULT_WINDOW_ID, DEFAULT_WINDOW = resolve_window()
+
+# Checkpoints of runs that hit the Lambda deadline ("<window id>#YES#CHECKPOINT"); the next run for the player resumes from one
+CHECKPOINT_SUFFIX = "#CHECKPOINT"
+CHECKPOINT_TTL_SECONDS = 24 * 60 * 60
+
+# Aggregate state of the last run ("<window id>#YES#STATE"), kept apart from the result so it
+# outlives the result's max age: even a miss then only folds in the matches played since
+STATE_SUFFIX = "#STATE"
+STATE_TTL_SECONDS = 365 * 24 * 60 * 60
+
+# How long a request without the compute lease waits for the leader's result before answering 202
+LEASE_WAIT_SECONDS = 20
+
+# Lease length while a job waits in the queue; the worker renews it once it picks the job up
+QUEUED_LEASE_SECONDS = 15 * 60
+
+def respond(status_code, body, headers=None):
+    return {
+        "statusCode": status_code,
+        "headers": {
+            "Access-Control-Allow-Origin": "*", 
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Methods": "OPTIONS,POST,GET",
+            "Access-Control-Expose-Headers": "X-Cache,Age",
+            **(headers or {})
+        },
+        "body": body
+    }
+
+def respond_summary(result_string, headers, stream_format=None, events=None, include=None):
+    """
+    A 200 carrying a summary, either as JSON or, when the client asked for a stream, as
+    NDJSON/SSE section events (the events of the run if given, else the finished result's).
+    include, if given, drops the optional sections it does not list from a full summary.
+
+    The Python Lambda runtime cannot stream a response, so the events are sent in one buffered
+    body; progressive delivery goes through the job item's partial result instead.
+    """
+    if include is not None:
+        result = json.loads(result_string)
+        result_string = json.dumps({k: v for k, v in result.items() if k not in OPTIONAL_SECTIONS or k in include})
+    if not stream_format:
+        return respond(200, result_string, headers)
+    events = events if events is not None else summary_stream.events_from_result(json.loads(result_string))
+    return respond(
+        200, "".join(summary_stream.encode_events(events, stream_format)),
+        {**headers, "Content-Type": summary_stream.CONTENT_TYPES[stream_format]}
+    )
+
+def feature_key(window_id):
+    return f"{window_id}#{FEATURE}"
+
+def job_window(window_id, window):
+    """The window as carried by job messages, so a worker computes exactly the requested range."""
+    return {"id": window_id, "start": window.start, "end": window.end, "timezone": window.timezone}
+
+def window_of_job(job):
+    """(window_id, CalendarWindow) of a job message; jobs queued before windows existed are the default season."""
+    spec = job.get("window")
+    if not spec:
+        return DEFAULT_WINDOW_ID, DEFAULT_WINDOW
+    return spec["id"], CalendarWindow(int(spec["start"]), int(spec["end"]), spec["timezone"])
+
+def compute_summary(game_name, tag_line, region, context=None, progress=None, sections=None,
+                    window_id=DEFAULT_WINDOW_ID, window=DEFAULT_WINDOW):
+    """
+    Computes (or, from the stored aggregate state, incrementally refreshes) a summary of `window`
+    and caches it under the window's id.
+
+    If the Lambda deadline arrives first, the partial work is checkpointed and DeadlineExceeded
+    is re-raised; the next call for the same player carries on from the checkpoint.
+    sections, if given, receives the partial (section, data) results as they are computed.
+    """
+    player_key = f"{game_name}#{tag_line}#{region}"
+    year_feature_key = feature_key(window_id)
+    checkpoint_key = {"player": player_key, "year#feature": year_feature_key + CHECKPOINT_SUFFIX}
+    checkpoint_item = table.get_item(Key=checkpoint_key).get("Item")
+    checkpoint = result_codec.decode(checkpoint_item["checkpoint"]) if checkpoint_item else None
+
+    # Resume from the persisted aggregate state instead of the whole year
+    state_key = {"player": player_key, "year#feature": year_feature_key + STATE_SUFFIX}
+    state_item = table.get_item(Key=state_key).get("Item")
+    state = result_codec.decode(state_item["state"]) if state_item else None
+    try:
+        result, state = incremental_summary(
+            game_name, tag_line, region, state=state, deadline=deadline_from_context(context), progress=progress,
+            checkpoint=checkpoint, sections=sections, window=window
+        )
+    except DeadlineExceeded as e:
+        if e.checkpoint:
+            now = int(time.time())
+            table.put_item(Item={
+                **checkpoint_key,
+                "checkpoint": result_codec.encode(e.checkpoint),
+                "timestamp": now,
+                "expiresAt": now + CHECKPOINT_TTL_SECONDS  # DynamoDB TTL attribute
+            })
+            print(f"Checkpointed {player_key} after {e.completed} matches")
+        raise
+
+    result_string = json.dumps(result)
+    print(f"Riot connection pool: {json.dumps(client.pool_stats())}")
+
+    # Result and aggregate state are stored as compressed binary blobs (see result_codec);
+    # the state lets refreshes fold in new matches only
+    now = int(time.time())
+    table.put_item(
+        Item={
+            **state_key,
+            "state": result_codec.encode(state),
+            "timestamp": now,
+            "expiresAt": now + STATE_TTL_SECONDS  # DynamoDB TTL attribute
+        }
+    )
+    table.put_item(
+        Item={
+            "player": player_key,
+            "year#feature": year_feature_key,
+            "result": result_codec.encode_text(result_string),
+            "timestamp": now,
+            "expiresAt": cache_policy.expires_at(year_feature_key, now)  # DynamoDB TTL attribute
+        }
+    )
+    if checkpoint_item:
+        table.delete_item(Key=checkpoint_key)
+    return result_string
+
+def run_job(job, context):
+    """Worker side of job mode: computes the summary and records progress/result on the job item."""
+    job_id = job["jobId"]
+    window_id, window = window_of_job(job)
+    player_key = f"{job['gameName']}#{job['tagLine']}#{job['region']}"
+    token = job.get("leaseToken")
+    if token and not lease.renew_lease(table, player_key, feature_key(window_id), token):
+        # The job waited in the queue past its lease: take it back unless another invocation now computes
+        token = lease.acquire_lease(table, player_key, feature_key(window_id), jobId=job_id)
+        if token is None:
+            jobs.update_job(table, job_id, jobs.FAILED, error="Another invocation is computing this summary")
+            return
+        job = {**job, "leaseToken": token}
+    jobs.update_job(table, job_id, jobs.RUNNING)
+    try:
+        # The lease is renewed for as long as the computation runs
+        with lease.LeaseKeeper(table, player_key, feature_key(window_id), token) if token else contextlib.nullcontext():
+            # Refreshes (and expired entries) resume from the stored aggregate state
+            progress = jobs.ProgressReporter(table, job_id)
+            result_string = compute_summary(
+                job["gameName"], job["tagLine"], job["region"], context=context, progress=progress,
+                sections=jobs.PartialResultReporter(table, job_id), window_id=window_id, window=window
+            )
+        jobs.update_job(table, job_id, jobs.DONE, result=result_codec.encode_text(result_string), processed=progress.processed)
+    except DeadlineExceeded as e:
+        if not e.checkpoint:
+            print(f"Job {job_id} failed: {str(e)}")
+            jobs.update_job(table, job_id, jobs.FAILED, error=str(e))
+        else:
+            # Out of time: hand the job (and its lease, held until a worker picks it up) to a fresh
+            # invocation, which resumes from the checkpoint
+            jobs.update_job(table, job_id, jobs.RUNNING, processed=e.completed)
+            if token:
+                lease.renew_lease(table, player_key, feature_key(window_id), token, QUEUED_LEASE_SECONDS)
+            job_queue.send(job)
+            return
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        jobs.update_job(table, job_id, jobs.FAILED, error=str(e))
+    # the lease is only released once the job is finished
+    if token:
+        lease.release_lease(table, player_key, feature_key(window_id), token)
+
+job_queue = jobs.get_queue(run_job)
+
+def start_background_refresh(game_name, tag_line, region, window_id=DEFAULT_WINDOW_ID, window=DEFAULT_WINDOW):
+    """Queues an incremental refresh of a stale summary, unless another request already started one."""
+    player_key = f"{game_name}#{tag_line}#{region}"
+    token = lease.acquire_lease(table, player_key, feature_key(window_id), QUEUED_LEASE_SECONDS)
+    if token is None:
+        return
+    try:
+        job = jobs.create_job(table, {
+            "gameName": game_name, "tagLine": tag_line, "region": region, "refresh": True,
+            "window": job_window(window_id, window)
+        })
+        job_queue.send({**job, "leaseToken": token})
+    except Exception as e:
+        print(f"Background refresh for {player_key} could not be queued: {str(e)}")
+        lease.release_lease(table, player_key, feature_key(window_id), token)
+
+def job_status(job_id):
+    job = jobs.get_job(table, job_id)
+    if not job:
+        return respond(404, "Unknown job")
+    status = {
+        "jobId": job_id,
+        "status": job["status"],
+        "processed": int(job.get("processed", 0)),
+    }
+    if job["status"] == jobs.DONE:
+        status["result"] = result_codec.decode(job["result"])
+    elif job["status"] == jobs.RUNNING and "partial" in job:
+        # Sections finished so far, for progressive rendering
+        status["partial"] = result_codec.decode(job["partial"])
+    if job["status"] == jobs.FAILED:
+        status["error"] = job.get("error")
+    return respond(200, json.dumps(status))
+
 def lambda_handler(event, context):
+    # 0. SQS DELIVERY: run queued summary jobs
+    if "Records" in event:
+        for record in event["Records"]:
+            run_job(json.loads(record["body"]), context)
+        return {"batchItemFailures": []}
+
+    # 0. STATUS POLL: GET ?jobId=...
+    query = event.get("queryStringParameters") or {}
+    if query.get("jobId"):
+        return job_status(query["jobId"])
+
     # 1. PARSE THE BODY FROM API GATEWAY
     try:
-        body = json.loads(event.get('body', '{}'))
+        body = json.loads(event.get('body') or '{}')
     except json.JSONDecodeError:
-        return {
-            "statusCode": 400,
-            "headers": {
-                "Access-Control-Allow-Origin": "*", 
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": "Invalid JSON in request body"
-        }
+        return respond(400, "Invalid JSON in request body")
 
     # 2. GET DATA FROM THE PARSED BODY
     game_name = body.get("gameName")
     tag_line = body.get("tagLine")
     region = body.get("region", "sea")  # expects "sea", "americas", etc.
+    refresh = bool(body.get("refresh", False))  # fold in matches played since the cached summary
+    run_async = bool(body.get("async", False))  # return 202 + jobId instead of computing inline
+    # "stream": "ndjson"/"sse" (or an Accept header) returns the summary as section events
+    stream_format = summary_stream.format_from_request(body, event.get("headers"))
+    include = body.get("include")  # optional list of the sections to compute/return
+    # "window": "2025" (default), "2025S2", "last30d" or {"start", "end"} in epoch seconds
+    try:
+        window_id, window = resolve_window(body.get("window"))
+    except ValueError as e:
+        return respond(400, str(e))
+
+    if include is not None and (not isinstance(include, list) or any(name not in OPTIONAL_SECTIONS for name in include)):
+        return respond(400, f"include must be a list of: {', '.join(OPTIONAL_SECTIONS)}")
 
     if not (game_name and tag_line):
-        return {
-            "statusCode": 400,
-            "headers": {
-                "Access-Control-Allow-Origin": "*", 
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": "Missing required fields"
-        }
+        return respond(400, "Missing required fields")
 
     player_key = f"{game_name}#{tag_line}#{region}"
-    year_feature_key = "2025#YES"
+    year_feature_key = feature_key(window_id)
 
     try:
         # 1 Check if record exists
@@ -49,50 +276,105 @@ def lambda_handler(event, context):
             }
         )
 
-        if "Item" in response:
+        item = response.get("Item")
+        cache_status, age = cache_policy.classify(item, year_feature_key)
+        if cache_status == cache_policy.HIT and not refresh:
             # 2️ Return cached result
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*", 
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                },
-                "body": response["Item"]["result"]
-            }
+            return respond_summary(
+                result_codec.decode_text(item["result"]), cache_policy.cache_headers(cache_status, age), stream_format,
+                include=include
+            )
+        if cache_status == cache_policy.STALE and not refresh:
+            # 2️ Serve the stale result straight away and fold in new matches in the background
+            start_background_refresh(game_name, tag_line, region, window_id, window)
+            return respond_summary(
+                result_codec.decode_text(item["result"]), cache_policy.cache_headers(cache_status, age), stream_format,
+                include=include
+            )
 
-        # 3️ Compute new summary - now passing region routing values
-        result = summary(game_name, tag_line, region)
+        if include is not None and cache_status == cache_policy.MISS:
+            # The cache only holds full summaries: a partial one is computed inline, without the lease, and not stored
+            events = []
+            try:
+                result, _ = incremental_summary(
+                    game_name, tag_line, region, deadline=deadline_from_context(context), include=include,
+                    sections=lambda section, data: events.append((section, data)), window=window
+                )
+            except DeadlineExceeded as e:
+                return respond(504, f"Summary timed out: {str(e)}")  # nothing is checkpointed for partial summaries
+            return respond_summary(json.dumps(result), cache_policy.cache_headers(cache_policy.MISS, 0), stream_format, events)
 
-        result_string = json.dumps(result)
+        # 3️ Only the invocation holding the lease computes; concurrent requests for the same key wait for it.
+        # In job mode the job item is written first, so followers handed its jobId can always poll it;
+        # a request that loses the lease deletes its own job item, which would never run
+        job = None
+        if run_async:
+            job = jobs.create_job(table, {
+                "gameName": game_name, "tagLine": tag_line, "region": region, "refresh": refresh,
+                "window": job_window(window_id, window)
+            })
+        if job:
+            token = lease.acquire_lease(table, player_key, year_feature_key, QUEUED_LEASE_SECONDS, jobId=job["jobId"])
+        else:
+            token = lease.acquire_lease(table, player_key, year_feature_key)
+        if token is None:
+            if job:
+                jobs.delete_job(table, job["jobId"])
+            if cache_status != cache_policy.MISS:
+                # Someone is already refreshing this summary, the cached one is good enough
+                return respond_summary(
+                    result_codec.decode_text(item["result"]), cache_policy.cache_headers(cache_status, age),
+                    stream_format, include=include
+                )
+            holder = lease.get_lease(table, player_key, year_feature_key) or {}
+            if run_async or holder.get("jobId"):
+                return respond(202, json.dumps({"jobId": holder.get("jobId"), "status": "computing"}))
+            wait = LEASE_WAIT_SECONDS
+            if context is not None:
+                wait = min(wait, context.get_remaining_time_in_millis() / 1000 - 5)
+            leader_item = lease.wait_for_result(
+                table, {"player": player_key, "year#feature": year_feature_key}, wait,
+                newer_than=int(item["timestamp"]) if item and "timestamp" in item else None
+            )
+            if leader_item:
+                return respond_summary(
+                    result_codec.decode_text(leader_item["result"]), cache_policy.cache_headers(cache_policy.MISS, 0),
+                    stream_format, include=include
+                )
+            return respond(202, json.dumps({"status": "computing"}))
 
-        # 4️ Store as string to avoid Decimal/float issues
-        table.put_item(
-            Item={
-                "player": player_key,
-                "year#feature": year_feature_key,
-                "result": result_string,
-                "timestamp": int(time.time())
-            }
-        )
+        # 4️ Job mode: hand the work (and the lease) to the queue and let the frontend poll the status endpoint
+        if run_async:
+            try:
+                job_queue.send({**job, "leaseToken": token})
+            except Exception:
+                lease.release_lease(table, player_key, year_feature_key, token)
+                jobs.delete_job(table, job["jobId"])
+                raise
+            return respond(202, json.dumps({"jobId": job["jobId"], "status": jobs.QUEUED}))
 
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Access-Control-Allow-Origin": "*", 
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": result_string
-        }
+        # 5️ Compute new summary inline - now passing region routing values
+        try:
+            # The aggregate state outlives the cached result, so even a miss only fetches new matches
+            events = [] if stream_format else None
+            with lease.LeaseKeeper(table, player_key, year_feature_key, token):
+                result_string = compute_summary(
+                    game_name, tag_line, region, context=context,
+                    sections=(lambda section, data: events.append((section, data))) if stream_format else None,
+                    window_id=window_id, window=window
+                )
+            return respond_summary(result_string, cache_policy.cache_headers(cache_policy.MISS, 0), stream_format, events)
+        finally:
+            lease.release_lease(table, player_key, year_feature_key, token)
+
+    except DeadlineExceeded as e:
+        if e.checkpoint:
+            # Partial work is saved; repeating the request continues from where this one stopped
+            return respond(202, json.dumps({"status": "partial", "processed": e.completed}))
+        return respond(504, f"Summary timed out: {str(e)}")
+
+    except RiotIdNotFound as e:
+        return respond(404, f"Player not found: {str(e)}")
 
     except Exception as e:
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Access-Control-Allow-Origin": "*", 
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": f"Error: {str(e)}"
-        }
\ No newline at end of file
+        return respond(500, f"Error: {str(e)}")
@@ -0,0 +1,143 @@
+# lease.py
+# Cache-stampede protection for the playerUserData result cache.
+#
+# When many requests for the same uncached player#year#feature key arrive together, only the
+# invocation that wins a conditional put on a "<feature>#LEASE" item computes the result.
+# The others poll the result item with backoff, or report that the result is still being
+# computed. Leases expire on their own (leaseExpires), so a crashed worker never blocks a key
+# for long, and the item is removed by DynamoDB TTL (expiresAt). A computation that can outlast
+# LEASE_SECONDS runs under a LeaseKeeper, which keeps renewing the lease while it is alive.
+
+import threading
+import time
+import uuid
+from botocore.exceptions import ClientError
+
+LEASE_SECONDS = 120
+
+
+def lease_key(player_key, feature_key):
+    return {"player": player_key, "year#feature": f"{feature_key}#LEASE"}
+
+
+def acquire_lease(table, player_key, feature_key, lease_seconds=LEASE_SECONDS, **attributes):
+    """
+    Tries to take the compute lease for a result key.
+
+    Returns a lease token when this invocation should compute the result, or None when another
+    invocation holds a live lease. Extra attributes (e.g. jobId) are stored on the lease item so
+    followers can find the leader's work.
+    """
+    token = uuid.uuid4().hex
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={
+                **lease_key(player_key, feature_key),
+                "owner": token,
+                "leaseExpires": now + lease_seconds,
+                "expiresAt": now + lease_seconds + 3600,  # DynamoDB TTL attribute
+                **attributes,
+            },
+            ConditionExpression="attribute_not_exists(#player) OR leaseExpires < :now",
+            ExpressionAttributeNames={"#player": "player"},
+            ExpressionAttributeValues={":now": now},
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return None
+        raise
+    return token
+
+
+def renew_lease(table, player_key, feature_key, token, lease_seconds=LEASE_SECONDS):
+    """Moves the lease's expiry lease_seconds from now; returns False if this invocation no longer owns it."""
+    now = int(time.time())
+    try:
+        table.update_item(
+            Key=lease_key(player_key, feature_key),
+            UpdateExpression="SET leaseExpires = :leaseExpires, expiresAt = :expiresAt",
+            ConditionExpression="#owner = :token",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={
+                ":leaseExpires": now + lease_seconds,
+                ":expiresAt": now + lease_seconds + 3600,
+                ":token": token,
+            },
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+        raise
+    return True
+
+
+class LeaseKeeper:
+    """
+    Context manager renewing a held lease every lease_seconds / 3 on a daemon thread, so it does
+    not expire under a computation however long it runs. lost is set if it was taken over anyway.
+    """
+
+    def __init__(self, table, player_key, feature_key, token, lease_seconds=LEASE_SECONDS):
+        self.table = table
+        self.player_key = player_key
+        self.feature_key = feature_key
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not renew_lease(self.table, self.player_key, self.feature_key, self.token, self.lease_seconds):
+                    self.lost = True
+                    print(f"Lease on {self.player_key} {self.feature_key} was taken over")
+                    return
+            except Exception as e:
+                print(f"Lease renewal failed for {self.player_key} {self.feature_key}: {e}")
+
+
+def get_lease(table, player_key, feature_key):
+    return table.get_item(Key=lease_key(player_key, feature_key)).get("Item")
+
+
+def release_lease(table, player_key, feature_key, token):
+    """Deletes the lease if this invocation still owns it."""
+    try:
+        table.delete_item(
+            Key=lease_key(player_key, feature_key),
+            ConditionExpression="#owner = :token",
+            ExpressionAttributeNames={"#owner": "owner"},
+            ExpressionAttributeValues={":token": token},
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            raise
+
+
+def wait_for_result(table, key, timeout, newer_than=None, first_delay=0.25, max_delay=2.0):
+    """
+    Polls a result item with exponential backoff; returns the item or None after timeout seconds.
+
+    With newer_than set, only an item whose timestamp is later than it counts (i.e. not the
+    expired entry that is being recomputed).
+    """
+    deadline = time.time() + timeout
+    delay = first_delay
+    while time.time() + delay < deadline:
+        time.sleep(delay)
+        item = table.get_item(Key=key).get("Item")
+        if item and "result" in item and (newer_than is None or int(item.get("timestamp", 0)) > newer_than):
+            return item
+        delay = min(delay * 2, max_delay)
+    return None
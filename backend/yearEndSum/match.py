@@ -1,4 +1,9 @@
+import json
+from collections import deque
 from functionality import request_with_retry
+import match_cache
+import match_decoder
+from routing import region_for_match_id
 import os
 api_key = os.getenv("RIOT_API_KEY")
 
@@ -20,21 +25,90 @@ def get_routing_value(region_code):
 def get_matches_by_puuid(puuid, region="sea", api_key=api_key, start_time=START_EPOCH_TIME_STAMP, end_time=END_EPOCH_TIME_STAMP, start=0, game_type=""):
     routing = get_routing_value(region)
     url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?type={game_type}&startTime={start_time}&endTime={end_time}&start={start}&count=100&api_key={api_key}"
-    response = request_with_retry(url)
+    response = request_with_retry(url, "match-v5.getMatchIdsByPUUID")
     return response.json()
 
+class MatchIdCursor:
+    """
+    Resumable iterator over a player's match IDs, listed page by page.
+
+    to_state() records the listing offset and the IDs listed but not handed out yet, so a later
+    invocation can carry on where this one stopped. The listing window ends at a fixed end_time
+    (callers cap it at the current time), so page offsets stay stable between invocations.
+    exclude skips one ID (the newest match of the state a refresh resumes from).
+    """
+
+    def __init__(self, puuid, region="sea", api_key=api_key, start_time=START_EPOCH_TIME_STAMP, game_type="",
+                 offset=0, pending=(), exclude=None, done=False, end_time=END_EPOCH_TIME_STAMP):
+        self.puuid = puuid
+        self.region = region
+        self.api_key = api_key
+        self.start_time = start_time
+        self.end_time = end_time
+        self.game_type = game_type
+        self.offset = offset
+        self.pending = deque(pending)
+        self.exclude = exclude
+        self.done = done
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            while self.pending:
+                match_id = self.pending.popleft()
+                if match_id != self.exclude:
+                    return match_id
+            if self.done:
+                raise StopIteration
+            page = get_matches_by_puuid(self.puuid, self.region, self.api_key, self.start_time, self.end_time,
+                                        start=self.offset, game_type=self.game_type)
+            self.offset += 100
+            if not page:
+                self.done = True
+            self.pending.extend(page)
+
+    def to_state(self, unfinished=()):
+        """unfinished: IDs already taken from the cursor that still need fetching."""
+        return {
+            'startTime': self.start_time,
+            'endTime': self.end_time,
+            'gameType': self.game_type,
+            'offset': self.offset,
+            'pending': list(unfinished) + list(self.pending),
+            'exclude': self.exclude,
+            'done': self.done,
+        }
+
+    @classmethod
+    def from_state(cls, puuid, region, state, api_key=api_key):
+        return cls(puuid, region, api_key, state['startTime'], state['gameType'],
+                   offset=state['offset'], pending=state['pending'], exclude=state['exclude'], done=state['done'],
+                   end_time=state.get('endTime', END_EPOCH_TIME_STAMP))
+
+def iter_full_year_matches(puuid, region="sea", api_key=api_key, start_time=START_EPOCH_TIME_STAMP, game_type=""):
+    """Yields match IDs page by page, so detail fetches can start before the listing is complete"""
+    return MatchIdCursor(puuid, region, api_key, start_time, game_type)
+
 def get_full_year_matches(puuid, region="sea", api_key=api_key, start_time=START_EPOCH_TIME_STAMP, game_type=""):
-    result = []
-    matches = get_matches_by_puuid(puuid, region, api_key, start_time, game_type=game_type)
-    i = 0
-    while matches:
-        result.extend(matches)
-        matches = get_matches_by_puuid(puuid, region, api_key, start_time, start=100*(i+1), game_type=game_type)
-        i += 1
-    return result
-
-def get_match_details_by_match_id(match_id, region="sea", api_key=api_key):
-    routing = get_routing_value(region)
+    return list(iter_full_year_matches(puuid, region, api_key, start_time, game_type))
+
+def get_match_details_by_match_id(match_id, region="sea", api_key=api_key, puuids=None):
+    """
+    The match document; with puuids (a set), a slim one keeping only what the summary reads of
+    those players and their teammates (see match_decoder), decoded straight from the raw bytes.
+    """
+    # Finished matches never change, so the payload is served from the match cache when possible
+    cached = match_cache.get_raw(match_id)
+    if cached is not None:
+        return match_decoder.decode(cached, puuids) if puuids else json.loads(cached)
+    # The match ID's platform prefix decides the host; region is only a fallback
+    routing = region_for_match_id(match_id) or get_routing_value(region)
     url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}?api_key={api_key}"
-    response = request_with_retry(url)
-    return response.json()
\ No newline at end of file
+    response = request_with_retry(url, "match-v5.getMatch")
+    if response.status_code == 200:
+        match_cache.put_raw(match_id, response.content)
+        if puuids:
+            return match_decoder.decode(response.content, puuids)
+    return response.json()
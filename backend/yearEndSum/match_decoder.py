@@ -0,0 +1,63 @@
+# match_decoder.py
+# Decodes raw MATCH-V5 responses straight into a slim match document.
+#
+# A /matches/{id} response is tens of kilobytes: 10 participants with well over 100 fields each
+# (plus a challenges map, perks, missions) and the teams' bans and objectives. The summary and
+# the match tables read about 15 fields of the player and the names of their teammates.
+#
+# decode() keeps the document's shape ({"metadata": {"matchId", "participants"}, "info":
+# {"gameCreation", "gameDuration", "participants": [...]}}), so aggregator sections and
+# match_table.project_participant read it unchanged, but every participant is cut down as soon
+# as it is parsed: the tracked players keep PLAYER_FIELDS, everyone else only TEAMMATE_FIELDS.
+# MATCH_DECODER picks the parser:
+#   orjson  parse with orjson, then project: ~3x faster than response.json(), similar peak memory
+#   hook    stdlib json with the projection in an object_hook, so only one full participant is
+#           ever alive: about response.json()'s speed at half its peak memory
+#   auto    orjson when it is installed, hook otherwise (default)
+# Either way the document that stays alive is a small fraction of the full one.
+# bench_match_decoder.py measures them against response.json().
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MATCH_DECODER = os.getenv("MATCH_DECODER", "auto")
+
+PLAYER_FIELDS = frozenset((
+    "puuid", "teamId", "win", "championName", "individualPosition", "kills", "deaths", "assists",
+    "pentaKills", "quadraKills", "tripleKills", "totalMinionsKilled", "neutralMinionsKilled",
+    "goldEarned", "totalDamageDealtToChampions", "visionScore", "riotIdGameName", "riotIdTagline",
+    "summonerName",
+))
+TEAMMATE_FIELDS = frozenset(("puuid", "teamId", "win", "riotIdGameName", "riotIdTagline", "summonerName"))
+INFO_FIELDS = frozenset(("gameCreation", "gameDuration", "gameEndTimestamp", "queueId", "participants"))
+METADATA_FIELDS = frozenset(("matchId", "participants"))
+
+
+def _project(obj, puuids):
+    """Cuts one decoded JSON object down if it is a participant, the info or the metadata."""
+    if "puuid" in obj and "championName" in obj:
+        fields = PLAYER_FIELDS if puuids is None or obj["puuid"] in puuids else TEAMMATE_FIELDS
+        return {k: v for k, v in obj.items() if k in fields}
+    if "participants" in obj:
+        fields = INFO_FIELDS if "gameCreation" in obj else METADATA_FIELDS
+        return {k: v for k, v in obj.items() if k in fields}
+    return obj
+
+
+def decode(raw, puuids=None, decoder=None):
+    """
+    Slim match document from raw response bytes. puuids (a set) are the players whose own stats
+    are kept; None keeps them for every participant (e.g. when rows are fanned out to all).
+    """
+    decoder = decoder or MATCH_DECODER
+    if decoder in ("orjson", "auto") and orjson is not None:
+        doc = orjson.loads(raw)
+        info = doc["info"]
+        info["participants"] = [_project(p, puuids) for p in info["participants"]]
+        return {"metadata": _project(doc["metadata"], puuids), "info": _project(info, puuids)}
+    return json.loads(raw, object_hook=lambda obj: _project(obj, puuids))
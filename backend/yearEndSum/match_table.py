@@ -0,0 +1,298 @@
+# match_table.py
+# Columnar per-player match store.
+#
+# Each fetched match is projected down to the tracked player's row (the ~20 fields the
+# summaries actually read, plus teammates). A player's rows form a typed pandas/Arrow table,
+# persisted as one Parquet document per player in a match_cache store, selected with
+# MATCH_TABLE_URL (dir:///tmp/match-tables by default, or sqlite:// / s3://). Statistics are
+# computed with vectorized group-bys over that table instead of walking match dicts.
+# A table only stands for a player's complete history over the listing range stored with it
+# as its coverage; rows of partial listings are never written under that range.
+#
+# pandas/pyarrow are optional: without them AVAILABLE is False and callers keep their
+# streaming code paths.
+
+import gzip
+import io
+import json
+import os
+import match_cache
+
+try:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    np = None
+    pd = None
+
+AVAILABLE = pd is not None
+
+MATCH_TABLE_URL = os.getenv("MATCH_TABLE_URL", "dir:///tmp/match-tables")
+
+POSITION_ALIASES = {
+    "TOP": "Top",
+    "JUNGLE": "Jungle",
+    "MIDDLE": "Middle",
+    "MID": "Middle",
+    "BOTTOM": "Bottom",
+    "BOT": "Bottom",
+    "SUPPORT": "Support",
+    "UTILITY": "Support",
+}
+
+# Column name -> pandas dtype
+SCHEMA = {
+    "matchId": "string",
+    "gameCreation": "int64",
+    "duration": "int64",
+    "championName": "string",
+    "position": "string",
+    "kills": "int64",
+    "deaths": "int64",
+    "assists": "int64",
+    "cs": "int64",
+    "gold": "int64",
+    "damage": "int64",
+    "vision": "int64",
+    "win": "bool",
+    "pentaKills": "int64",
+    "quadraKills": "int64",
+    "tripleKills": "int64",
+    "teammates": "object",
+    "teammateNames": "object",
+    "teammateTaglines": "object",
+}
+
+
+def project_participant(m, puuid):
+    """Projects one match payload down to the player's row (None if they are not in it)."""
+    metadata, info = m['metadata'], m['info']
+    if puuid not in metadata['participants']:
+        return None
+    idx = metadata['participants'].index(puuid)
+    p = info['participants'][idx]
+
+    team_start = (idx // 5) * 5
+    team_end = min(team_start + 5, len(metadata['participants']), len(info['participants']))
+    teammates, names, taglines = [], [], []
+    for teammate_idx in range(team_start, team_end):
+        teammate_puuid = metadata['participants'][teammate_idx]
+        if teammate_idx == idx or teammate_puuid == puuid:
+            continue
+        teammate_info = info['participants'][teammate_idx]
+        teammates.append(teammate_puuid)
+        names.append(teammate_info.get('riotIdGameName') or teammate_info.get('summonerName') or "Unknown")
+        taglines.append(teammate_info.get('riotIdTagline'))
+
+    return {
+        "matchId": metadata.get('matchId'),
+        "gameCreation": info.get('gameCreation', 0),
+        "duration": info.get('gameDuration', 0),
+        "championName": p.get('championName', 'Unknown'),
+        "position": POSITION_ALIASES.get((p.get('individualPosition') or "").upper(), "Unknown"),
+        "kills": p.get('kills', 0),
+        "deaths": p.get('deaths', 0),
+        "assists": p.get('assists', 0),
+        "cs": p.get('totalMinionsKilled', 0) + p.get('neutralMinionsKilled', 0),
+        "gold": p.get('goldEarned', 0),
+        "damage": p.get('totalDamageDealtToChampions', 0),
+        "vision": p.get('visionScore', 0),
+        "win": bool(p.get('win', False)),
+        "pentaKills": p.get('pentaKills', 0),
+        "quadraKills": p.get('quadraKills', 0),
+        "tripleKills": p.get('tripleKills', 0),
+        "teammates": teammates,
+        "teammateNames": names,
+        "teammateTaglines": taglines,
+    }
+
+
+def build_table(rows):
+    """Builds a typed table from projected rows."""
+    table = pd.DataFrame(rows, columns=list(SCHEMA))
+    return table.astype(SCHEMA)
+
+
+def append_rows(table, rows):
+    """Adds new rows to a player's table, keeping one row per match ID."""
+    new = build_table(rows)
+    if table is None or table.empty:
+        return new
+    combined = pd.concat([table, new], ignore_index=True)
+    return combined.drop_duplicates(subset="matchId", keep="last").reset_index(drop=True)
+
+
+# === Persistence (one Parquet document per player and table) ===
+# The year-end summaries' table holds the player's season; the strengths-and-weaknesses rows
+# (their last 20 matches, whatever the season) are kept apart so neither mistakes the other's
+# rows for its own history.
+SEASON_TABLE = "season"
+RECENT_TABLE = "recent"
+
+_store = None
+
+
+def _table_store():
+    global _store
+    if _store is None:
+        _store = match_cache.open_store(MATCH_TABLE_URL)
+    return _store
+
+
+def load_player_table(puuid, name=SEASON_TABLE):
+    """
+    Returns (table, coverage): coverage is the [start, end) listing range (epoch seconds) the
+    table is known to hold every match of, as stored by save_player_table, or None.
+    """
+    store = _table_store()
+    raw = store.get(f"{puuid}.{name}.parquet") if store is not None else None
+    if raw is None:
+        return None, None
+    arrow = pq.read_table(io.BytesIO(raw))
+    coverage = (arrow.schema.metadata or {}).get(b"coverage")
+    table = arrow.to_pandas()
+    # Arrow hands list columns back as numpy arrays
+    for column in ("teammates", "teammateNames", "teammateTaglines"):
+        table[column] = table[column].map(list)
+    return table.astype(SCHEMA), json.loads(coverage) if coverage else None
+
+
+def save_player_table(puuid, table, coverage=None, name=SEASON_TABLE):
+    store = _table_store()
+    if store is None:
+        return
+    try:
+        arrow = pa.Table.from_pandas(table, preserve_index=False)
+        if coverage is not None:
+            metadata = dict(arrow.schema.metadata or {})
+            metadata[b"coverage"] = json.dumps(list(coverage)).encode("utf-8")
+            arrow = arrow.replace_schema_metadata(metadata)
+        buffer = io.BytesIO()
+        pq.write_table(arrow, buffer)
+        store.put(f"{puuid}.{name}.parquet", buffer.getvalue())
+    except Exception as e:
+        print(f"Match table write failed for {puuid}: {e}")
+
+
+# Rows projected by a run that stopped at its deadline, kept apart from the player's table until
+# the run completes so the table never holds a partial history
+def load_partial_rows(puuid):
+    store = _table_store()
+    raw = store.get(f"{puuid}.partial.json.gz") if store is not None else None
+    return json.loads(gzip.decompress(raw)) if raw is not None else None
+
+
+def save_partial_rows(puuid, rows):
+    store = _table_store()
+    if store is None:
+        return
+    try:
+        store.put(f"{puuid}.partial.json.gz", gzip.compress(json.dumps(rows).encode("utf-8")))
+    except Exception as e:
+        print(f"Partial match rows write failed for {puuid}: {e}")
+
+
+# === Vectorized statistics ===
+def month_labels(game_creation_ms, window):
+    """Buckets a gameCreation column (ms) into the window's month keys with one searchsorted call."""
+    return window.bucket_array(np.asarray(game_creation_ms, dtype=np.int64) // 1000)
+
+
+def aggregate_state(table, puuid, window):
+    """
+    Computes the year-end aggregate state (the SummaryAggregator.to_state() layout) for the
+    games of a player's table inside `window` (a CalendarWindow) with group-bys, so an
+    aggregator can be rebuilt without any Riot call.
+    """
+    created = table["gameCreation"]
+    table = table[(created >= window.start * 1000) & (created < window.end * 1000)]
+    wins = table["win"]
+    stats = {
+        'gamesPlayed': int(len(table)),
+        'wins': int(wins.sum()),
+        'losses': int((~wins).sum()),
+        'hoursPlayed': float(table["duration"].sum() / 3600),
+        'kills': int(table["kills"].sum()),
+        'deaths': int(table["deaths"].sum()),
+        'assists': int(table["assists"].sum()),
+        'pentakills': int(table["pentaKills"].sum()),
+        'quadrakills': int(table["quadraKills"].sum()),
+        'triplekills': int(table["tripleKills"].sum()),
+        'roles': {role: int(n) for role, n in table["position"].value_counts().items()},
+    }
+
+    champions = table.groupby("championName").agg(
+        games=("matchId", "size"),
+        wins=("win", "sum"),
+        kills=("kills", "sum"),
+        deaths=("deaths", "sum"),
+        assists=("assists", "sum"),
+    )
+    champions["losses"] = champions["games"] - champions["wins"]
+    stats['champions'] = {
+        champ: {key: int(row[key]) for key in ('games', 'wins', 'losses', 'kills', 'deaths', 'assists')}
+        for champ, row in champions.iterrows()
+    }
+
+    known = table[table["position"] != "Unknown"]
+    champion_roles = {}
+    for (champ, role), n in known.groupby(["championName", "position"]).size().items():
+        champion_roles.setdefault(champ, {})[role] = int(n)
+
+    months = table.assign(month=month_labels(table["gameCreation"], window), losses=~wins)
+    monthly = months.groupby("month").agg(
+        wins=("win", "sum"),
+        losses=("losses", "sum"),
+        kills=("kills", "sum"),
+        deaths=("deaths", "sum"),
+        assists=("assists", "sum"),
+    )
+    monthly_data = {month: {key: int(v) for key, v in row.items()} for month, row in monthly.iterrows()}
+
+    duos = table[["teammates", "teammateNames", "teammateTaglines"]].explode(
+        ["teammates", "teammateNames", "teammateTaglines"]
+    ).dropna(subset=["teammates"])
+    duo_counts = {teammate: int(n) for teammate, n in duos["teammates"].value_counts().items()}
+    first_seen = duos.drop_duplicates(subset="teammates")
+    duo_profiles = {
+        row.teammates: {'name': row.teammateNames, 'tagline': row.teammateTaglines}
+        for row in first_seen.itertuples(index=False)
+    }
+
+    newest = table.loc[table["gameCreation"].idxmax()] if len(table) else None
+    return {
+        'version': 1,
+        'puuid': puuid,
+        'window': [window.start, window.end, window.timezone],
+        'stats': stats,
+        'championRoles': champion_roles,
+        'monthlyData': monthly_data,
+        'duoCounts': duo_counts,
+        'duoProfiles': duo_profiles,
+        'newestMatchId': newest["matchId"] if newest is not None else None,
+        'newestGameCreation': int(newest["gameCreation"]) if newest is not None else 0,
+    }
+
+
+def saw_metrics(table):
+    """
+    Strengths-and-weaknesses raw metrics for a player's table.
+
+    Returns (metrics, impact_list) in the layout strengths_weaknesses.get_raw_metrics uses.
+    """
+    metrics = {
+        'total_games': int(len(table)),
+        'kills': int(table["kills"].sum()),
+        'deaths': int(table["deaths"].sum()),
+        'assists': int(table["assists"].sum()),
+        'damage': int(table["damage"].sum()),
+        'gold': int(table["gold"].sum()),
+        'cs': int(table["cs"].sum()),
+        'vision': int(table["vision"].sum()),
+        'wins': int(table["win"].sum()),
+        'champion_variety': set(table["championName"].unique()),
+    }
+    impact = table["kills"] + table["assists"] - table["deaths"]
+    return metrics, [int(v) for v in impact]
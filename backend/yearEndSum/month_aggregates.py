@@ -0,0 +1,80 @@
+# month_aggregates.py
+# Finished calendar months of a player's history, stored as aggregate states.
+#
+# A summary over any window (season, split, custom range) reuses the months it covers that an
+# earlier run already aggregated, merging their states (SummaryAggregator.merge) instead of
+# listing and fetching those months' matches again; only the remaining parts of the window
+# cost Riot calls. A month is stored once it is over plus SETTLE_SECONDS (games still running
+# at midnight have been listed by then) and never changes afterwards, so items do not expire.
+#
+# Items live in playerUserData under "puuid#<puuid>" with the sort key
+# "v1#MONTH#<timezone>#<YYYY-MM>", as a result_codec blob.
+
+import os
+import time
+import result_codec
+from calendar_window import month_window
+
+SORT_KEY_PREFIX = "v1#MONTH"
+SETTLE_SECONDS = 24 * 60 * 60
+
+_dynamodb = None
+
+
+def _resource():
+    global _dynamodb
+    if _dynamodb is None:
+        import boto3
+        _dynamodb = boto3.resource("dynamodb")
+    return _dynamodb
+
+
+def _table_name():
+    return os.getenv("DYNAMODB_TABLE", "playerUserData")
+
+
+def _key(puuid, timezone, month):
+    return {"player": f"puuid#{puuid}", "year#feature": f"{SORT_KEY_PREFIX}#{timezone}#{month}"}
+
+
+def finished_months(window, now=None):
+    """Keys of the window's buckets that are whole calendar months and over (storable/reusable)."""
+    now = time.time() if now is None else now
+    months = []
+    for key, start, end in window.segments():
+        whole = month_window(key, window.timezone)
+        if (start, end) == (whole.start, whole.end) and end + SETTLE_SECONDS <= now:
+            months.append(key)
+    return months
+
+
+def load(puuid, timezone, months):
+    """{month: aggregate state} for the months stored for this player (one BatchGetItem per 100)."""
+    states = {}
+    table_name = _table_name()
+    try:
+        for i in range(0, len(months), 100):
+            request = {table_name: {"Keys": [_key(puuid, timezone, month) for month in months[i:i + 100]]}}
+            while request:
+                response = _resource().batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(table_name, []):
+                    states[item["year#feature"].rsplit("#", 1)[-1]] = result_codec.decode(item["state"])
+                request = response.get("UnprocessedKeys") or None
+    except Exception as e:
+        print(f"Month aggregates read failed for {puuid}: {e}")
+        return {}
+    return states
+
+
+def save(puuid, timezone, states):
+    """Stores {month: aggregate state}; failures only cost a re-fetch later."""
+    try:
+        with _resource().Table(_table_name()).batch_writer() as batch:
+            for month, state in states.items():
+                batch.put_item(Item={
+                    **_key(puuid, timezone, month),
+                    "state": result_codec.encode(state),
+                    "timestamp": int(time.time()),
+                })
+    except Exception as e:
+        print(f"Month aggregates write failed for {puuid}: {e}")
@@ -0,0 +1,80 @@
+# result_codec.py
+# One storage format for every cached result in playerUserData (YES, SAW, COMP, job results).
+#
+# A result is stored as a DynamoDB Binary attribute laid out as
+#
+#     b"RC" | version (1 byte) | uncompressed length (4 bytes, big endian) | zlib(JSON)
+#
+# so a read is one decompress + one json.loads, floats survive without Decimal conversion,
+# and items are several times smaller than the JSON string / nested map they replace. The
+# length prefix lets decode reject truncated or corrupt blobs instead of returning garbage.
+#
+# Legacy values are still readable: JSON strings (old YES results), nested maps with Decimal
+# numbers (old SAW/COMP results) and bare zlib JSON blobs (old YES aggregate state).
+
+import json
+import struct
+import zlib
+from decimal import Decimal
+
+MAGIC = b"RC"
+VERSION = 1
+HEADER = struct.Struct(">2sBI")
+COMPRESSION_LEVEL = 6
+
+
+class CodecError(ValueError):
+    """Raised when a stored blob is not a valid encoded result."""
+
+
+def encode_text(text):
+    """Encodes an already serialized JSON document."""
+    raw = text.encode("utf-8")
+    return HEADER.pack(MAGIC, VERSION, len(raw)) + zlib.compress(raw, COMPRESSION_LEVEL)
+
+
+def encode(obj):
+    return encode_text(json.dumps(obj, separators=(",", ":")))
+
+
+def _from_decimal(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, dict):
+        return {k: _from_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_from_decimal(v) for v in obj]
+    return obj
+
+
+def decode_text(value):
+    """Returns the stored result as a JSON string (e.g. to hand straight to an HTTP response)."""
+    # boto3 hands Binary attributes back wrapped in boto3.dynamodb.types.Binary
+    value = getattr(value, "value", value)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(_from_decimal(value))
+    blob = bytes(value)
+    if not blob.startswith(MAGIC):
+        return zlib.decompress(blob).decode("utf-8")
+    if len(blob) < HEADER.size:
+        raise CodecError("Truncated result header")
+    _, version, length = HEADER.unpack_from(blob)
+    if version != VERSION:
+        raise CodecError(f"Unsupported result codec version {version}")
+    try:
+        raw = zlib.decompress(blob[HEADER.size:])
+    except zlib.error as e:
+        raise CodecError(f"Corrupt result payload: {e}") from e
+    if len(raw) != length:
+        raise CodecError(f"Result length mismatch: expected {length} bytes, got {len(raw)}")
+    return raw.decode("utf-8")
+
+
+def decode(value):
+    """Decodes a stored result (any supported format) back into Python objects."""
+    value = getattr(value, "value", value)
+    if isinstance(value, (dict, list)):
+        return _from_decimal(value)
+    return json.loads(decode_text(value))
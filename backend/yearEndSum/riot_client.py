@@ -0,0 +1,81 @@
+# riot_client.py
+# Shared HTTP client for every Riot API call made by this Lambda.
+#
+# A module-level requests.Session keeps a keep-alive connection pool per host
+# (sea.api.riotgames.com, sg2.api.riotgames.com, ...). The pool outlives a single invocation,
+# so warm containers skip the TCP+TLS handshake entirely. Each host pool holds as many
+# connections as there are fetch workers. Every request also goes through the shared rate
+# limiter.
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import limiter
+
+# Number of match-detail requests allowed in flight at once; also the per-host pool size
+MAX_FETCH_WORKERS = int(os.getenv("MATCH_FETCH_WORKERS", "8"))
+REQUEST_TIMEOUT = 10
+
+# Enough host pools for every regional cluster and platform, so none is ever evicted
+HOST_POOLS = 24
+
+
+class RiotClient:
+    def __init__(self, pool_maxsize=MAX_FETCH_WORKERS, timeout=REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=HOST_POOLS, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self.adapter)
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.rate_limited = 0
+
+    def get(self, url, method, headers=None, params=None, max_retries=3):
+        """
+        GET under the shared rate limiter, retrying while Riot still answers 429.
+
+        method names the Riot endpoint (e.g. "match-v5.getMatch") so it gets its own
+        rate-limit bucket. Returns the last response.
+        """
+        for attempt in range(max_retries):
+            limiter.acquire(url, method)
+            response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            limiter.update(url, method, response)
+            with self._lock:
+                self.requests_sent += 1
+                if response.status_code == 429:
+                    self.rate_limited += 1
+            if response.status_code != 429:
+                return response
+            print(f"Rate limited on {method}. Retry-After: {response.headers.get('Retry-After', 1)}s")
+        return response
+
+    def pool_stats(self):
+        """
+        Connection reuse per host since the container started.
+
+        A hit is a request served over an already-open connection; a miss had to open
+        (handshake) a new one.
+        """
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[pool.host] = {
+                "hits": max(0, pool.num_requests - pool.num_connections),
+                "misses": pool.num_connections,
+            }
+        return {
+            "requests": self.requests_sent,
+            "rateLimited": self.rate_limited,
+            "hits": sum(h["hits"] for h in hosts.values()),
+            "misses": sum(h["misses"] for h in hosts.values()),
+            "hosts": hosts,
+        }
+
+
+# Process-wide instance, reused across warm invocations
+client = RiotClient()
@@ -0,0 +1,121 @@
+# stream_server.py
+# Local harness for progressive year-end summaries: serves iter_summary() over HTTP as real
+# chunked NDJSON or SSE, one chunk per section, without Lambda, API Gateway or DynamoDB.
+#
+#     RIOT_API_KEY=... python stream_server.py                  # live Riot data
+#     python stream_server.py --replay test.json --delay 0.5    # replays a saved result, no keys
+#
+#     curl -N "http://localhost:8765/summary?gameName=Faker&tagLine=KR1&region=asia"
+#     curl -N "http://localhost:8765/summary?gameName=Faker&tagLine=KR1&region=asia&format=sse"
+#     curl -N "http://localhost:8765/summary?gameName=Faker&tagLine=KR1&region=asia&window=2025S2"
+#
+# POSTing the Lambda's JSON body ({"gameName", "tagLine", "region", "stream"}) works as well, so
+# the frontend can point VITE_YES_STREAM_URL here. Nothing is cached: each request recomputes.
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import summary_stream
+from fixtures import load_payload
+
+
+class SummaryStreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # needed for chunked transfer encoding
+    replay = None  # saved result to replay instead of calling Riot
+    delay = 0.0
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/summary":
+            return self._error(404, "Not found")
+        self._stream({k: v[0] for k, v in parse_qs(url.query).items()})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError:
+            return self._error(400, "Invalid JSON in request body")
+        self._stream(body)
+
+    def _stream(self, params):
+        fmt = params.get("format") or summary_stream.format_from_request(params, dict(self.headers)) or summary_stream.NDJSON
+        if fmt not in summary_stream.CONTENT_TYPES:
+            return self._error(400, f"Unknown stream format: {fmt}")
+
+        if self.replay is not None:
+            events = self._replay_events()
+        else:
+            if not (params.get("gameName") and params.get("tagLine")):
+                return self._error(400, "Missing required fields")
+            from year_end_summary import iter_summary
+            from calendar_window import resolve_window
+            try:
+                _, window = resolve_window(params.get("window"))
+            except ValueError as e:
+                return self._error(400, str(e))
+            events = iter_summary(params["gameName"], params["tagLine"], params.get("region", "sea"), window=window)
+
+        self.send_response(200)
+        self._cors_headers()
+        self.send_header("Content-Type", summary_stream.CONTENT_TYPES[fmt])
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        started = time.time()
+        try:
+            for section, data in events:
+                self._chunk(summary_stream.encode_event(section, data, fmt))
+                self.log_message("%s after %.2fs", section, time.time() - started)
+        except (BrokenPipeError, ConnectionResetError):
+            return  # client went away
+        except Exception as e:
+            # Headers are gone already, so the failure is reported as a final event
+            self._chunk(summary_stream.encode_event("error", {"message": str(e)}, fmt))
+        self._chunk("")
+
+    def _replay_events(self):
+        for event in summary_stream.events_from_result(self.replay):
+            time.sleep(self.delay)
+            yield event
+
+    def _chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _cors_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Allow-Methods", "OPTIONS,POST,GET")
+
+    def _error(self, status, message):
+        data = message.encode("utf-8")
+        self.send_response(status)
+        self._cors_headers()
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streams year-end summaries locally as NDJSON or SSE")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--replay", help="saved summary (JSON or test.json-style literal) to stream instead")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between replayed sections")
+    args = parser.parse_args()
+
+    SummaryStreamHandler.replay = load_payload(args.replay) if args.replay else None
+    SummaryStreamHandler.delay = args.delay
+    server = ThreadingHTTPServer(("", args.port), SummaryStreamHandler)
+    print(f"Streaming summaries on http://localhost:{args.port}/summary")
+    server.serve_forever()
@@ -0,0 +1,55 @@
+# summary_stream.py
+# Wire formats for progressive year-end summaries.
+#
+# iter_summary() yields (section, data) pairs; a client rebuilds the summary by setting
+# result[section] = data for every pair except "progress", which reports how far the match
+# history has got ({"gamesPlayed": n, "complete": bool}). Two encodings are supported:
+#
+#     ndjson  one {"section": ..., "data": ...} object per line (application/x-ndjson)
+#     sse     "event: <section>" / "data: <json>" blocks (text/event-stream)
+#
+# Cached results are sent as the same events, so clients only handle one shape.
+
+import json
+
+NDJSON = "ndjson"
+SSE = "sse"
+
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    SSE: "text/event-stream",
+}
+
+
+def encode_event(section, data, fmt=NDJSON):
+    payload = json.dumps(data, separators=(",", ":"))
+    if fmt == SSE:
+        return f"event: {section}\ndata: {payload}\n\n"
+    return f'{{"section":{json.dumps(section)},"data":{payload}}}\n'
+
+
+def encode_events(events, fmt=NDJSON):
+    """Encodes an iterable of (section, data) pairs, one chunk per event."""
+    for section, data in events:
+        yield encode_event(section, data, fmt)
+
+
+def events_from_result(result):
+    """The events of an already computed summary, e.g. a cache hit."""
+    for section, data in result.items():
+        yield section, data
+    games = (result.get("yearStats") or {}).get("gamesPlayed", 0)
+    yield "progress", {"gamesPlayed": games, "complete": True}
+
+
+def format_from_request(body, headers):
+    """Stream format asked for with {"stream": "ndjson"|"sse"|true} or an Accept header, else None."""
+    stream = body.get("stream")
+    if stream in (NDJSON, SSE):
+        return stream
+    accept = {k.lower(): v for k, v in (headers or {}).items()}.get("accept", "")
+    if CONTENT_TYPES[SSE] in accept:
+        return SSE
+    if stream or CONTENT_TYPES[NDJSON] in accept:
+        return NDJSON
+    return None
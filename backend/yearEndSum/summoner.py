@@ -1,5 +1,5 @@
-import requests
 from functionality import request_with_retry
+import riot_id_cache
 import os
 api_key = os.getenv("RIOT_API_KEY")
 
@@ -18,30 +18,37 @@ REGION_TO_PLATFORMS = {
     'sea': ['sg2', 'ph2', 'th2', 'tw2', 'vn2']
 }
 
+def get_platform(region, puuid=None):
+    # The platform the PUUID is known to live on (stored by riot_id_cache), else the region's first
+    if puuid:
+        platform = riot_id_cache.get_puuid_platform(puuid)
+        if platform:
+            return platform
+    return REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
+
 def get_account_details_by_name(summoner_name, tagline, region, api_key=api_key):
     # Use asia for SEA account API, otherwise use region as-is
     account_region = REGION_TO_ACCOUNT_API.get(region.lower(), 'asia')
     url = f"https://{account_region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{summoner_name}/{tagline}?api_key={api_key}"
-    response = request_with_retry(url)
-    return response.json()
+    # Resolved IDs (and recent 404s) are cached, so retries and repeat players skip the call
+    return riot_id_cache.resolve(summoner_name, tagline, region, lambda: request_with_retry(url, "account-v1.getByRiotId"))
 
 def get_summoner_details_by_puuid(puuid, region, api_key=api_key):
-    # Use first platform from region
-    platform = REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
+    platform = get_platform(region, puuid)
     url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}?api_key={api_key}"
-    response = request_with_retry(url)
+    response = request_with_retry(url, "summoner-v4.getByPUUID")
     return response.json()
 
 def get_summoner_mastery_by_puuid(puuid, region, api_key=api_key):
-    platform = REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
+    platform = get_platform(region, puuid)
     url = f"https://{platform}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}?api_key={api_key}"
-    response = request_with_retry(url)
+    response = request_with_retry(url, "champion-mastery-v4.getAllChampionMasteriesByPUUID")
     return response.json()
 
 def get_summoner_rank_by_puuid(puuid, region, api_key=api_key):
-    platform = REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
+    platform = get_platform(region, puuid)
     url = f"https://{platform}.api.riotgames.com/lol/league/v4/entries/by-puuid/{puuid}?api_key={api_key}"
-    response = request_with_retry(url)
+    response = request_with_retry(url, "league-v4.getLeagueEntriesByPUUID")
     data = response.json()
     
     # Default: unranked
@@ -82,13 +89,19 @@ def get_summoner_rank_by_puuid(puuid, region, api_key=api_key):
     }
 
 def get_challenge_by_puuid(puuid, region, api_key=api_key):
-    platform = REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
+    platform = get_platform(region, puuid)
     url = f"https://{platform}.api.riotgames.com/lol/challenges/v1/player-data/{puuid}?api_key={api_key}"
-    response = request_with_retry(url)
+    response = request_with_retry(url, "lol-challenges-v1.getPlayerData")
     return response.json()
 
 def get_challenge_config_by_id(challenge_id, region, api_key=api_key):
     platform = REGION_TO_PLATFORMS.get(region.lower(), ['sg2'])[0]
     url = f"https://{platform}.api.riotgames.com/lol/challenges/v1/challenges/{challenge_id}/config?api_key={api_key}"
-    response = request_with_retry(url)
-    return response.json()
\ No newline at end of file
+    response = request_with_retry(url, "lol-challenges-v1.getChallengeConfigs")
+    return response.json()
+
+def get_challenge_configs(region, api_key=api_key):
+    platform = get_platform(region)
+    url = f"https://{platform}.api.riotgames.com/lol/challenges/v1/challenges/config?api_key={api_key}"
+    response = request_with_retry(url, "lol-challenges-v1.getAllChallengeConfigs")
+    return response.json()
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraph:
+    """
+    Runs named tasks on a thread pool as soon as the tasks they depend on have finished.
+
+        graph = TaskGraph()
+        graph.add("account", lookup_account)
+        graph.add("rank", lambda account: get_rank(account["puuid"]), "account")
+        results = graph.run()   # {"account": ..., "rank": ...}
+
+    Each task receives its dependencies' results as positional arguments, in the order the
+    dependencies were listed. Independent branches run at the same time, so the total time
+    is bounded by the slowest chain instead of the sum of every call. The first failing task
+    cancels whatever has not started yet and its exception is re-raised from run().
+
+    iter_run() yields (name, result) pairs as tasks finish instead, for callers that can use
+    early results while slower branches are still running.
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._tasks = {}
+
+    def add(self, name, fn, *deps):
+        if name in self._tasks:
+            raise ValueError(f"Task already defined: {name}")
+        self._tasks[name] = (fn, deps)
+        return self
+
+    def run(self):
+        return dict(self.iter_run())
+
+    def iter_run(self):
+        for name, (_, deps) in self._tasks.items():
+            missing = [dep for dep in deps if dep not in self._tasks]
+            if missing:
+                raise ValueError(f"Task {name} depends on undefined tasks: {', '.join(missing)}")
+
+        results = {}
+        waiting = dict(self._tasks)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while waiting or running:
+                for name, (fn, deps) in list(waiting.items()):
+                    if all(dep in results for dep in deps):
+                        del waiting[name]
+                        running[executor.submit(fn, *(results[dep] for dep in deps))] = name
+                if not running:
+                    raise ValueError(f"Dependency cycle between tasks: {', '.join(waiting)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    yield name, results[name]
+        finally:
+            # Do not wait for branches that are still running after a failure
+            executor.shutdown(wait=False, cancel_futures=True)
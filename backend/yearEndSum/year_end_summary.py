@@ -1,19 +1,17 @@
-from collections import defaultdict
+import math
+import queue
+import threading
+import time
 import match
 import summoner
-from mapping import champion_position_map, champion_id_map
-
-# --- Position normalization map ---
-POSITION_ALIASES = {
-    "TOP": "Top",
-    "JUNGLE": "Jungle",
-    "MIDDLE": "Middle",
-    "MID": "Middle",
-    "BOTTOM": "Bottom",
-    "BOT": "Bottom",
-    "SUPPORT": "Support",
-    "UTILITY": "Support",
-}
+from fetch_pipeline import fetch_match_details, DeadlineExceeded
+import match_table
+import month_aggregates
+from aggregator import SummaryAggregator, DEFAULT_WINDOW, SECTION_NAMES
+from calendar_window import CalendarWindow, month_window
+from task_graph import TaskGraph
+from challenge_catalogue import describe_challenge
+from mapping import champion_id_map
 
 def _normalize_champion_name(value: str) -> str:
     return "".join(ch.lower() for ch in value if ch.isalnum())
@@ -33,24 +31,114 @@ for alias, source in _ID_ALIAS_SOURCE.items():
     if alias not in NORMALIZED_ID_MAP and source in NORMALIZED_ID_MAP:
         NORMALIZED_ID_MAP[alias] = NORMALIZED_ID_MAP[source]
 
+# Bump when the checkpoint layout changes; older checkpoints are then ignored
+CHECKPOINT_VERSION = 3
+
+# Match-derived sections are re-sent by iter_summary after every this many fetched matches
+SNAPSHOT_EVERY = 25
+
+# Sections a caller can pick with include; summoner and performanceMetrics are always present
+OPTIONAL_SECTIONS = SECTION_NAMES + ('recentAchievements',)
+
 # --- Main summary logic ---
-def summary(game_name, tagline, region):
+def summary(game_name, tagline, region, deadline=None, max_workers=None, include=None, window=DEFAULT_WINDOW):
+    result, _ = incremental_summary(game_name, tagline, region, deadline=deadline, max_workers=max_workers,
+                                    include=include, window=window)
+    return result
+
+def incremental_summary(game_name, tagline, region, state=None, deadline=None, max_workers=None, progress=None,
+                        checkpoint=None, sections=None, include=None, window=DEFAULT_WINDOW):
+    """
+    Builds the summary and returns (result, aggregate state).
+
+    Pass the state returned by a previous run to only list and fold in matches played
+    after its newest match; everything else is recomputed from the merged tallies.
+    progress, if given, is called with the number of matches fetched so far.
+
+    When the deadline arrives mid-history, DeadlineExceeded is raised with a checkpoint
+    (partial tallies plus the match-ID cursor); pass it back as checkpoint to carry on.
+
+    sections, if given, is called with each (section, data) pair of iter_summary().
+    include, if given, limits the summary to those OPTIONAL_SECTIONS; the other section plug-ins
+    and lookups are skipped. window (a CalendarWindow, see calendar_window.resolve_window) is the
+    period the match-derived sections cover; finished months stored by earlier runs over any
+    window are reused instead of fetched again.
+    """
+    events = iter_summary(game_name, tagline, region, state, deadline, max_workers, progress, checkpoint,
+                          include=include, window=window)
+    while True:
+        try:
+            section, data = next(events)
+        except StopIteration as done:
+            return done.value
+        if sections:
+            sections(section, data)
+
+def iter_summary(game_name, tagline, region, state=None, deadline=None, max_workers=None, progress=None,
+                 checkpoint=None, snapshot_every=SNAPSHOT_EVERY, include=None, window=DEFAULT_WINDOW):
+    """
+    Generator form of incremental_summary: yields (section, data) pairs as parts of the summary
+    become known, and returns (result, aggregate state) when done.
+
+    'summoner' (profile and rank) and 'recentAchievements' come from cheap lookups and go out
+    as soon as they arrive. The match-derived sections (yearStats, monthlyProgress, topChampions,
+    roleDistribution, bestDuo, plus the summoner's main champion, KDA and win rate) are sent with
+    the tallies so far every snapshot_every matches, and once more at the end. Each pair replaces
+    the section it names; ('progress', {'gamesPlayed', 'complete'}) follows every match update.
+    """
+    include = OPTIONAL_SECTIONS if include is None else tuple(include)
+    unknown = [name for name in include if name not in OPTIONAL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown summary sections: {', '.join(unknown)}")
+    match_sections = tuple(name for name in SECTION_NAMES if name in include)
+
     acc_details = summoner.get_account_details_by_name(game_name, tagline, region)
     puuid = acc_details['puuid']
-    details = summoner.get_summoner_details_by_puuid(puuid, region)
-    rank_info = summoner.get_summoner_rank_by_puuid(puuid, region)
-    
-    # Will be populated after we determine the most played champion
+
+    # Finished lookups and match snapshots arrive on one queue: the task graph runs on its own
+    # thread, and snapshots are taken on the thread folding in the matches
+    updates = queue.Queue()
+
+    def snapshot(aggregator):
+        # A copy, so sections can be built from it while the aggregation carries on
+        updates.put(('snapshot', SummaryAggregator.from_state(aggregator.to_state())))
+
+    # Everything below only needs the PUUID, so the independent lookups run side by side
+    # and the slowest branch (usually the match history) bounds the total time.
+    graph = TaskGraph()
+    graph.add('details', lambda: summoner.get_summoner_details_by_puuid(puuid, region))
+    graph.add('rank', lambda: summoner.get_summoner_rank_by_puuid(puuid, region))
+    graph.add('mastery', lambda: summoner.get_summoner_mastery_by_puuid(puuid, region))
+    if 'recentAchievements' in include:
+        graph.add('challenges', lambda: summoner.get_challenge_by_puuid(puuid, region))
+        graph.add('achievements', lambda challenges: _recent_achievements(challenges, region), 'challenges')
+    graph.add('aggregator', lambda: _aggregate_matches(
+        puuid, region, state, deadline, max_workers, progress, checkpoint, snapshot, snapshot_every, match_sections,
+        window
+    ))
+
+    def run_graph():
+        try:
+            for name, value in graph.iter_run():
+                updates.put(('task', (name, value)))
+        except BaseException as e:
+            updates.put(('error', e))
+        else:
+            updates.put(('done', None))
+
+    # If the caller stops iterating early, the remaining lookups still finish on this daemon thread
+    threading.Thread(target=run_graph, daemon=True).start()
+
     base = {
         'summoner': {
             'name': acc_details['gameName'],
-            'avatar': '',  # Will be set later
-            'mainChampion': '',  # Will be set later
-            'championIcon': '',  # Will be set later
-            'level': details['summonerLevel'],
-            'rank': rank_info['rank'],
-            'lp': rank_info['lp'],
-            'kda': '0:1',  # Will be calculated later
+            'avatar': '',  # Set from the most played champion
+            'mainChampion': '',
+            'championIcon': '',
+            'level': 0,
+            'rank': '',
+            'lp': 0,
+            'kda': '0:1',
             'winRate': 0,
             'region': region.upper(),
         },
@@ -62,272 +150,293 @@ def summary(game_name, tagline, region):
         'recentAchievements': [],
         'bestDuo': None,
     }
-
-    matches = match.get_full_year_matches(puuid, region)
-
-    # === Monthly timestamp boundaries (AEDT) ===
-    month_boundaries = [
-        ("Nov", 1730379600),
-        ("Dec", 1732971600),
-        ("Jan", 1735650000),
-        ("Feb", 1738328400),
-        ("Mar", 1740747600),
-        ("Apr", 1743426000),
-        ("May", 1746021600),
-        ("Jun", 1748700000),
-        ("Jul", 1751292000),
-        ("Aug", 1753970400),
-        ("Sep", 1756648800),
-        ("Oct", 1759240800),
-        ("Nov", 1761915600),
-    ]
-
-    stats = {
-        'gamesPlayed': 0,
-        'wins': 0,
-        'losses': 0,
-        'hoursPlayed': 0,
-        'kills': 0,
-        'deaths': 0,
-        'assists': 0,
-        'pentakills': 0,
-        'quadrakills': 0,
-        'triplekills': 0,
-        'roles': defaultdict(int),
-        'champions': defaultdict(lambda: {
-            'games': 0,
-            'wins': 0,
-            'losses': 0,
-            'kills': 0,
-            'deaths': 0,
-            'assists': 0
-        }),
-    }
-
-    monthly_data = defaultdict(lambda: {
-        'wins': 0,
-        'losses': 0,
-        'kills': 0,
-        'deaths': 0,
-        'assists': 0
-    })
-
-    duo_counts = defaultdict(int)
-    duo_profiles = {}
-
-    for match_id in matches:
-        m = match.get_match_details_by_match_id(match_id)
-        metadata, info = m['metadata'], m['info']
-        if puuid not in metadata['participants']:
+    for name in OPTIONAL_SECTIONS:
+        if name not in include:
+            del base[name]
+    results = {}
+
+    def profile_ready():
+        return 'details' in results and 'rank' in results
+
+    while True:
+        kind, value = updates.get()
+        if kind == 'error':
+            raise value
+        if kind == 'done':
+            break
+        if kind == 'snapshot':
+            yield from _match_sections(base, value, results.get('mastery', []), profile_ready())
+            yield 'progress', {'gamesPlayed': value.games, 'complete': False}
             continue
 
-        idx = metadata['participants'].index(puuid)
-        p = info['participants'][idx]
-
-        # === Aggregate general stats ===
-        stats['gamesPlayed'] += 1
-        stats['hoursPlayed'] += info.get('gameDuration', 0) / 3600
-        stats['kills'] += p.get('kills', 0)
-        stats['deaths'] += p.get('deaths', 0)
-        stats['assists'] += p.get('assists', 0)
-        stats['wins'] += 1 if p.get('win', False) else 0
-        stats['losses'] += 0 if p.get('win', False) else 1
-        stats['pentakills'] += p.get('pentaKills', 0)
-        stats['quadrakills'] += p.get('quadraKills', 0)
-        stats['triplekills'] += p.get('tripleKills', 0)
-
-        raw_pos = (p.get('individualPosition') or "").upper()
-        role = POSITION_ALIASES.get(raw_pos, "Unknown")
-        stats['roles'][role] += 1
-
-        # === Champion stats ===
-        champ = p.get('championName', 'Unknown')
-        cstats = stats['champions'][champ]
-        cstats['games'] += 1
-        if p.get('win', False):
-            cstats['wins'] += 1
-        else:
-            cstats['losses'] += 1
-        cstats['kills'] += p.get('kills', 0)
-        cstats['deaths'] += p.get('deaths', 0)
-        cstats['assists'] += p.get('assists', 0)
-
-        # === Aggregate Monthly Progress ===
-        created_time = info.get('gameCreation', 0) / 1000
-        month_name = None
-        for i, (name, start_ts) in enumerate(month_boundaries):
-            next_start = month_boundaries[i + 1][1] if i + 1 < len(month_boundaries) else float("inf")
-            if start_ts <= created_time < next_start:
-                month_name = name
-                break
-        if not month_name:
-            month_name = "Unknown"
-
-        mdata = monthly_data[month_name]
-        if p.get('win', False):
-            mdata['wins'] += 1
-        else:
-            mdata['losses'] += 1
-        mdata['kills'] += p.get('kills', 0)
-        mdata['deaths'] += p.get('deaths', 0)
-        mdata['assists'] += p.get('assists', 0)
-
-        # === Track duo partners ===
-        team_start = (idx // 5) * 5
-        team_end = min(team_start + 5, len(metadata['participants']))
-        for teammate_idx in range(team_start, team_end):
-            if teammate_idx == idx or teammate_idx >= len(info['participants']):
-                continue
-            teammate_puuid = metadata['participants'][teammate_idx]
-            if teammate_puuid == puuid:
-                continue
-            duo_counts[teammate_puuid] += 1
-            teammate_info = info['participants'][teammate_idx]
-            duo_profiles.setdefault(teammate_puuid, {
-                'name': teammate_info.get('riotIdGameName') or teammate_info.get('summonerName') or "Unknown",
-                'tagline': teammate_info.get('riotIdTagline'),
-            })
-
-    # === Yearly summary ===
-    base['yearStats'] = {
-        'gamesPlayed': stats['gamesPlayed'],
-        'wins': stats['wins'],
-        'losses': stats['losses'],
-        'hoursPlayed': round(stats['hoursPlayed'], 1),
-        'totalKills': stats['kills'],
-        'totalDeaths': stats['deaths'],
-        'totalAssists': stats['assists'],
-        'pentakills': stats['pentakills'],
-        'quadrakills': stats['quadrakills'],
-        'triplekills': stats['triplekills'],
-    }
-
-    # === Monthly Progress summary ===
-    base['monthlyProgress'] = []
-    for month, data in sorted(monthly_data.items(), key=lambda x: month_boundaries.index(next((b for b in month_boundaries if b[0] == x[0]), ("ZZZ", 0)))):
-        total_games = data['wins'] + data['losses']
-        kda = round((data['kills'] + data['assists']) / max(1, data['deaths']), 2) if total_games else 0
-        base['monthlyProgress'].append({
-            'month': month,
-            'wins': data['wins'],
-            'losses': data['losses'],
-            'kda': kda
-        })
-
-    # === Role distribution ===
-    total_roles = sum(stats['roles'].values()) or 1
-    base['roleDistribution'] = [
-        {'role': r, 'value': round(v / total_roles * 100, 1)}
-        for r, v in stats['roles'].items() if r != "Unknown"
-    ]
+        name, result = value
+        results[name] = result
+        if name in ('details', 'rank') and profile_ready():
+            base['summoner']['level'] = results['details']['summonerLevel']
+            base['summoner']['rank'] = results['rank']['rank']
+            base['summoner']['lp'] = results['rank']['lp']
+            yield 'summoner', dict(base['summoner'])
+        elif name == 'achievements':
+            base['recentAchievements'] = result
+            yield 'recentAchievements', result
+
+    aggregator = results['aggregator']
+    yield from _match_sections(base, aggregator, results['mastery'], True)
+    yield 'progress', {'gamesPlayed': aggregator.games, 'complete': True}
+    timings = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in aggregator.timings.items())
+    print(f"Summary section timings over {aggregator.games} matches: {timings}")
+    return base, aggregator.to_state()
+
+def _match_sections(base, aggregator, mastery_data, profile_ready):
+    """Fills the match-derived parts of base from the aggregator and yields the updated sections."""
+    sections = aggregator.finalize()
+    for name in ('yearStats', 'monthlyProgress', 'roleDistribution', 'bestDuo'):
+        if name in sections:
+            base[name] = sections[name]
 
     # === Top Champions Summary ===
-    top_champs = sorted(
-        stats['champions'].items(),
-        key=lambda x: x[1]['games'],
-        reverse=True
-    )[:5]
-    
-    # Get the most played champion (top 1)
-    most_played_champion = top_champs[0][0] if top_champs else "Unknown"
-
-    # Get mastery data for the summoner
-    mastery_data = summoner.get_summoner_mastery_by_puuid(puuid, region)
-    
-    # Create a lookup dictionary for mastery by champion ID
-    mastery_lookup = {}
-    for mastery in mastery_data:
-        champ_id = mastery.get('championId')
-        mastery_lookup[champ_id] = {
-            'championLevel': mastery.get('championLevel'),
-            'championPoints': mastery.get('championPoints'),
-            'tokensEarned': mastery.get('tokensEarned', 0)
-        }
-    
-    # Update summoner info with main champion details
-    base['summoner']['mainChampion'] = most_played_champion
-    base['summoner']['avatar'] = f"https://ddragon.leagueoflegends.com/cdn/img/champion/splash/{most_played_champion}_0.jpg"
-    base['summoner']['championIcon'] = f"https://ddragon.leagueoflegends.com/cdn/13.24.1/img/champion/{most_played_champion}.png"
-
-    # Track role for each champion in top 5
-    champion_roles = {}
-    for name in [champ[0] for champ in top_champs]:
-        # Get the most played role for this champion
-        champ_role_counts = defaultdict(int)
-        for match_id in matches:
-            m = match.get_match_details_by_match_id(match_id)
-            metadata, info = m['metadata'], m['info']
-            if puuid not in metadata['participants']:
-                continue
-            idx = metadata['participants'].index(puuid)
-            p = info['participants'][idx]
-            if p.get('championName') == name:
-                raw_pos = (p.get('individualPosition') or "").upper()
-                role = POSITION_ALIASES.get(raw_pos, "Unknown")
-                if role != "Unknown":
-                    champ_role_counts[role] += 1
-        if champ_role_counts:
-            champion_roles[name] = max(champ_role_counts.items(), key=lambda x: x[1])[0]
-        else:
-            champion_roles[name] = "Unknown"
-
-    base['topChampions'] = []
-    for name, data in top_champs:
-        wins = data.get('wins', 0)
-        losses = data.get('losses', 0)
-        kills = data.get('kills', 0)
-        deaths = data.get('deaths', 0)
-        assists = data.get('assists', 0)
-        games = data.get('games', 0)
-
-        winrate = round(wins / games * 100, 1) if games else 0
-        kda = round((kills + assists) / max(1, deaths), 2)
-
-        # Get champion ID from champion_id_map
-        champion_id = champion_id_map.get(name)
-        
-        # Get mastery info for this champion
-        mastery_info = mastery_lookup.get(champion_id, {})
-        
-        # Format mastery points with commas
-        mastery_points = mastery_info.get('championPoints', 0)
-        formatted_points = f"{mastery_points:,}"
-
-        base['topChampions'].append({
-            'name': name,
-            'mastery': mastery_info.get('championLevel', 0),
-            'points': formatted_points,
-            'games': games,
-            'winRate': winrate,
-            'kda': kda,
-            'role': champion_roles.get(name, "Unknown"),
-            'image': f"https://ddragon.leagueoflegends.com/cdn/img/champion/splash/{name}_0.jpg"
-        })
+    if 'topChampions' in sections:
+        top_champs = sections['topChampions']
+
+        # Get the most played champion (top 1)
+        most_played_champion = top_champs[0][0] if top_champs else "Unknown"
+
+        # Create a lookup dictionary for mastery by champion ID
+        mastery_lookup = {}
+        for mastery in mastery_data:
+            champ_id = mastery.get('championId')
+            mastery_lookup[champ_id] = {
+                'championLevel': mastery.get('championLevel'),
+                'championPoints': mastery.get('championPoints'),
+                'tokensEarned': mastery.get('tokensEarned', 0)
+            }
+
+        # Update summoner info with main champion details
+        base['summoner']['mainChampion'] = most_played_champion
+        base['summoner']['avatar'] = f"https://ddragon.leagueoflegends.com/cdn/img/champion/splash/{most_played_champion}_0.jpg"
+        base['summoner']['championIcon'] = f"https://ddragon.leagueoflegends.com/cdn/13.24.1/img/champion/{most_played_champion}.png"
+
+        base['topChampions'] = []
+        for name, data, role in top_champs:
+            wins = data.get('wins', 0)
+            kills = data.get('kills', 0)
+            deaths = data.get('deaths', 0)
+            assists = data.get('assists', 0)
+            games = data.get('games', 0)
+
+            winrate = round(wins / games * 100, 1) if games else 0
+            kda = round((kills + assists) / max(1, deaths), 2)
+
+            # Get champion ID from champion_id_map
+            champion_id = champion_id_map.get(name)
+
+            # Get mastery info for this champion
+            mastery_info = mastery_lookup.get(champion_id, {})
+
+            # Format mastery points with commas
+            mastery_points = mastery_info.get('championPoints', 0)
+            formatted_points = f"{mastery_points:,}"
+
+            base['topChampions'].append({
+                'name': name,
+                'mastery': mastery_info.get('championLevel', 0),
+                'points': formatted_points,
+                'games': games,
+                'winRate': winrate,
+                'kda': kda,
+                'role': role,
+                'image': f"https://ddragon.leagueoflegends.com/cdn/img/champion/splash/{name}_0.jpg"
+            })
 
     # === Compute winrate and KDA ===
-    if stats['gamesPlayed'] > 0:
-        base['summoner']['winRate'] = round(stats['wins'] / stats['gamesPlayed'] * 100, 1)
-        
+    year_stats = sections.get('yearStats')
+    if year_stats and year_stats['gamesPlayed'] > 0:
+        base['summoner']['winRate'] = round(year_stats['wins'] / year_stats['gamesPlayed'] * 100, 1)
+
         # Calculate overall KDA ratio
-        total_kills = stats['kills']
-        total_deaths = stats['deaths']
-        total_assists = stats['assists']
-        kda_ratio = round((total_kills + total_assists) / max(1, total_deaths), 1)
+        kda_ratio = round(
+            (year_stats['totalKills'] + year_stats['totalAssists']) / max(1, year_stats['totalDeaths']), 1
+        )
         base['summoner']['kda'] = f"{kda_ratio}:1"
 
-    if duo_counts:
-        best_puuid, games_together = max(duo_counts.items(), key=lambda item: item[1])
-        profile = duo_profiles.get(best_puuid, {})
-        base['bestDuo'] = {
-            'puuid': best_puuid,
-            'name': profile.get('name'),
-            'tagline': profile.get('tagline'),
-            'gamesTogether': games_together,
-        }
+    # The summoner section waits for the profile lookups, which resend it with these fields
+    if profile_ready:
+        yield 'summoner', dict(base['summoner'])
+    for section in ('yearStats', 'performanceMetrics', 'monthlyProgress', 'topChampions', 'roleDistribution', 'bestDuo'):
+        if section in base:
+            yield section, base[section]
+
+
+def _state_covers(state, puuid, sections, window):
+    state_window = CalendarWindow(*state['window']) if 'window' in state else DEFAULT_WINDOW
+    return (
+        state.get('puuid') == puuid
+        and set(sections) <= set(state.get('sections', SECTION_NAMES))
+        and state_window == window
+    )
+
+
+def _plan_from_months(puuid, sections, window, now):
+    """
+    Starts a window from the player's stored months: returns the aggregator with those merged
+    in, the (start, end) ranges still to fetch, and aggregators for the finished months that
+    will be fetched in full (stored afterwards, when every section is computed).
+    """
+    finished = month_aggregates.finished_months(window, now)
+    stored = month_aggregates.load(puuid, window.timezone, finished) if finished else {}
+    stored = {month: state for month, state in stored.items() if _state_covers(
+        state, puuid, sections, month_window(month, window.timezone)
+    )}
+
+    aggregator = SummaryAggregator(puuid, sections, window)
+    for month in sorted(stored):
+        aggregator.merge(SummaryAggregator.from_state(stored[month], sections))
+
+    # Every run of consecutive months without a stored aggregate is listed in one range
+    ranges = []
+    for key, start, end in window.segments():
+        if key in stored:
+            continue
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
 
+    months = {}
+    if set(sections) == set(SECTION_NAMES):
+        months = {
+            month: SummaryAggregator(puuid, window=month_window(month, window.timezone))
+            for month in finished if month not in stored
+        }
+    if stored:
+        print(f"Reusing {len(stored)} stored months for {puuid}; fetching {len(ranges)} ranges")
+    return aggregator, ranges, months
+
+
+def _table_complete(coverage, window):
+    """Whether a match table with this coverage holds every match of the window so far."""
+    return coverage is not None and coverage[0] <= window.start
+
+
+def _rows_extend_table(coverage, rows_range, window):
+    """
+    Whether rows listed over rows_range can be stored as the player's table: listed from the
+    window's start they are a complete table on their own, otherwise they only extend a complete
+    table that reaches the start of the listing.
+    """
+    return rows_range[0] <= window.start or (
+        _table_complete(coverage, window) and coverage[1] >= rows_range[0]
+    )
+
+
+def _save_rows(puuid, table, coverage, rows, rows_range, window):
+    if rows_range[0] <= window.start:
+        match_table.save_player_table(puuid, match_table.build_table(rows), (window.start, rows_range[1]))
+    elif _rows_extend_table(coverage, rows_range, window):
+        match_table.save_player_table(puuid, match_table.append_rows(table, rows),
+                                      (coverage[0], max(coverage[1], rows_range[1])))
+
+
+def _aggregate_matches(puuid, region, state=None, deadline=None, max_workers=None, progress=None, checkpoint=None,
+                       snapshot=None, snapshot_every=SNAPSHOT_EVERY, sections=SECTION_NAMES, window=DEFAULT_WINDOW):
+    # The per-player match table holds the default season, so only that window reads or extends it
+    table, coverage = None, None
+    if match_table.AVAILABLE and window == DEFAULT_WINDOW:
+        table, coverage = match_table.load_player_table(puuid)
+    # Listings stop at the current time, so page offsets stay put while a run is checkpointed
+    now = int(time.time())
+    cursor = None
+    exclude = None
+    months = {}
+
+    if (checkpoint and checkpoint.get('version') == CHECKPOINT_VERSION
+            and _state_covers(checkpoint['state'], puuid, sections, window)):
+        # Carry on with an interrupted run: its partial tallies, the match IDs still to fetch
+        # and the rows it projected so far
+        aggregator = SummaryAggregator.from_state(checkpoint['state'], sections)
+        aggregator.watermark = checkpoint['watermark']
+        cursor = match.MatchIdCursor.from_state(puuid, region, checkpoint['cursor'])
+        ranges = [tuple(r) for r in checkpoint['ranges']]
+        months = {month: SummaryAggregator.from_state(s) for month, s in checkpoint['months'].items()}
+        fetched = checkpoint['fetched']
+        rows_range = checkpoint['rowsRange']
+        rows = None
+        if match_table.AVAILABLE and rows_range:
+            rows = match_table.load_partial_rows(puuid) if checkpoint['rows'] else []
+        if rows is not None and len(rows) != checkpoint['rows']:
+            rows = None  # written by another container or lost; never save a table with gaps
+    else:
+        if (not (state and _state_covers(state, puuid, sections, window)) and _table_complete(coverage, window)
+                and len(table)):
+            # Rebuild the tallies from the player's stored match table (vectorized, no Riot calls)
+            state = match_table.aggregate_state(table, puuid, window)
+
+        if state and _state_covers(state, puuid, sections, window):
+            aggregator = SummaryAggregator.from_state(state, sections)
+            # Only list matches that started at or after the newest one already counted
+            ranges = [(max(aggregator.newest_game_creation // 1000, window.start), window.end)]
+            exclude = aggregator.newest_match_id
+        else:
+            aggregator, ranges, months = _plan_from_months(puuid, sections, window, now)
+        ranges = [(start, min(end, now)) for start, end in ranges if start < min(end, now)]
+        fetched = 0
+        # Rows are only projected when this run's one listing completes the season's table: from
+        # the season's start, or from a complete stored table's end on (never around stored months)
+        rows_range = ranges[0] if len(ranges) == 1 and _rows_extend_table(coverage, ranges[0], window) else None
+        rows = [] if match_table.AVAILABLE and window == DEFAULT_WINDOW and rows_range else None
+    watermark = aggregator.watermark
+    if snapshot and aggregator.games:
+        snapshot(aggregator)  # tallies carried over from the state, stored months or checkpoint
+
+    # === Single pass over the match history ===
+    # Each match payload is fetched once (concurrently, in completion order) and folded
+    # into every match-derived section; new matches are also projected into the player's table.
+    try:
+        while cursor is not None or ranges:
+            if cursor is None:
+                start, end = ranges.pop(0)
+                cursor = match.MatchIdCursor(puuid, region, start_time=start, end_time=end, exclude=exclude)
+            for _, payload in fetch_match_details(cursor, region, max_workers=max_workers, deadline=deadline,
+                                                  puuids={puuid}):
+                if aggregator.consume(payload):
+                    month_aggregator = months.get(window.bucket(payload['info'].get('gameCreation', 0) // 1000))
+                    if month_aggregator is not None:
+                        month_aggregator.consume(payload)
+                    if match_table.AVAILABLE and rows is not None:
+                        rows.append(match_table.project_participant(payload, puuid))
+                fetched += 1
+                if progress:
+                    progress(fetched)
+                if snapshot and fetched % snapshot_every == 0:
+                    snapshot(aggregator)
+            cursor = None
+    except DeadlineExceeded as e:
+        # Checkpoint everything needed to resume instead of losing the calls made so far
+        if rows:
+            match_table.save_partial_rows(puuid, rows)
+        raise DeadlineExceeded(fetched, checkpoint={
+            'version': CHECKPOINT_VERSION,
+            'puuid': puuid,
+            'state': aggregator.to_state(),
+            'watermark': watermark,
+            'cursor': cursor.to_state(e.unfinished),
+            'ranges': [list(r) for r in ranges],
+            'months': {month: month_aggregator.to_state() for month, month_aggregator in months.items()},
+            'fetched': fetched,
+            'rows': len(rows) if rows is not None else -1,
+            'rowsRange': list(rows_range) if rows is not None else None,
+        }) from e
+
+    if rows:
+        _save_rows(puuid, table, coverage, rows, rows_range, window)
+    if months:
+        month_aggregates.save(puuid, window.timezone, {
+            month: month_aggregator.to_state() for month, month_aggregator in months.items()
+        })
+    return aggregator
 
-    challenges = summoner.get_challenge_by_puuid(puuid, region)
 
+def _recent_achievements(challenges, region):
     def level_score(level):
         mapping = {
             "IRON": 1, "BRONZE": 2, "SILVER": 3, "GOLD": 4, "PLATINUM": 5,
@@ -335,7 +444,6 @@ def summary(game_name, tagline, region):
         }
         return mapping.get(level.upper(), 0)
 
-    import math, time
     now = int(time.time() * 1000)
 
     # --- Rank by rarity + recency + tier ---
@@ -354,17 +462,18 @@ def summary(game_name, tagline, region):
 
     top_challenges = [c for _, c in sorted(scored, key=lambda x: x[0], reverse=True)[:4]]
 
-    base["recentAchievements"] = []
+    # Names and descriptions come from the cached challenge catalogue, not one call per challenge
+    achievements = []
     for c in top_challenges:
-        config = summoner.get_challenge_config_by_id(c["challengeId"], region)
-        base["recentAchievements"].append({
+        config = describe_challenge(c["challengeId"], region)
+        achievements.append({
             "id": c["challengeId"],
-            "name": config.get("localizedNames", {}).get("en_US", {}).get("name", "Unknown Challenge"),
-            "description": config.get("localizedNames", {}).get("en_US", {}).get("description", ""),
+            "name": config["name"],
+            "description": config["description"],
             "level": c.get("level"),
             "percentile": c.get("percentile"),
             "value": c.get("value"),
             "achievedTime": c.get("achievedTime")
         })
 
-    return base
+    return achievements
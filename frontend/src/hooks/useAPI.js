@@ -4,6 +4,8 @@ import { useState } from "react";
 const SAW_FUNCTION_URL = import.meta.env.VITE_SAW_FUNCTION_URL;
 const YES_FUNCTION_URL = import.meta.env.VITE_YES_FUNCTION_URL;
 const COMP_FUNCTION_URL = import.meta.env.VITE_COMP_FUNCTION_URL;
+// Optional: a server that streams summary sections as NDJSON (e.g. backend/yearEndSum/stream_server.py)
+const YES_STREAM_URL = import.meta.env.VITE_YES_STREAM_URL;
 
 /* -------------------- SAW -------------------- */
 export function useSAW() {
@@ -42,25 +44,105 @@ export function useSAW() {
 }
 
 /* -------------------- YES -------------------- */
+const YES_POLL_INTERVAL_MS = 2000;
+
+// Polls the YES status endpoint until the background job finishes
+async function waitForYESJob(jobId, onProgress, onPartial) {
+  for (;;) {
+    await new Promise((resolve) => setTimeout(resolve, YES_POLL_INTERVAL_MS));
+
+    const resp = await fetch(`${YES_FUNCTION_URL}?jobId=${encodeURIComponent(jobId)}`);
+    if (!resp.ok) throw new Error(`HTTP error! status: ${resp.status}`);
+
+    const job = await resp.json();
+    if (job.status === "done") return job.result;
+    if (job.status === "failed") throw new Error(job.error || "Summary job failed");
+    onProgress(job.processed || 0);
+    if (job.partial) onPartial(job.partial);
+  }
+}
+
+// Reads an NDJSON stream of {section, data} events, merging each section into the summary as it arrives
+async function readYESStream(resp, onProgress, onPartial) {
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  const result = {};
+  let buffered = "";
+
+  const apply = (line) => {
+    if (!line.trim()) return;
+    const { section, data } = JSON.parse(line);
+    if (section === "error") throw new Error(data.message || "Summary stream failed");
+    if (section === "progress") {
+      onProgress(data.gamesPlayed || 0);
+      return;
+    }
+    result[section] = data;
+    onPartial({ ...result });
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split("\n");
+    buffered = lines.pop();
+    lines.forEach(apply);
+  }
+  apply(buffered + decoder.decode());
+  return result;
+}
+
 export function useYES() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [data, setData] = useState(null);
+  const [progress, setProgress] = useState(0);
+  // Sections of the summary received so far, while it is still being computed
+  const [partial, setPartial] = useState(null);
 
-  const fetchYES = async ({ gameName, tagLine, region }) => {
+  // window (optional): "2025" (default season), "2025S2", "last30d" or { start, end } in epoch seconds
+  const fetchYES = async ({ gameName, tagLine, region, window }) => {
     setLoading(true);
     setError(null);
+    setProgress(0);
+    setPartial(null);
 
     try {
-      const resp = await fetch(YES_FUNCTION_URL, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ gameName, tagLine, region }),
-      });
-
-      if (!resp.ok) throw new Error(`HTTP error! status: ${resp.status}`);
-
-      const result = await resp.json();
+      if (YES_STREAM_URL) {
+        const resp = await fetch(YES_STREAM_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json", Accept: "application/x-ndjson" },
+          body: JSON.stringify({ gameName, tagLine, region, window, stream: "ndjson" }),
+        });
+
+        if (!resp.ok) throw new Error(`HTTP error! status: ${resp.status}`);
+
+        const result = await readYESStream(resp, setProgress, setPartial);
+        setData(result);
+        return result;
+      }
+
+      // async: cached summaries still come back directly (200), new ones return 202 + jobId.
+      // A 202 without a jobId means another request is computing this summary inline: ask again shortly.
+      let result;
+      for (;;) {
+        const resp = await fetch(YES_FUNCTION_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ gameName, tagLine, region, window, async: true }),
+        });
+
+        if (!resp.ok) throw new Error(`HTTP error! status: ${resp.status}`);
+
+        result = await resp.json();
+        if (resp.status !== 202) break;
+        if (result.jobId) {
+          result = await waitForYESJob(result.jobId, setProgress, setPartial);
+          break;
+        }
+        await new Promise((resolve) => setTimeout(resolve, YES_POLL_INTERVAL_MS));
+      }
       setData(result);
       return result;
     } catch (err) {
@@ -72,7 +154,7 @@ export function useYES() {
     }
   };
 
-  return { fetchYES, loading, error, data };
+  return { fetchYES, loading, error, data, progress, partial };
 }
 
 /* -------------------- COMP -------------------- */